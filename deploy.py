@@ -86,6 +86,11 @@ def main():
             logger.warning(f"⚠️ Requirements file {requirements_file} not found, using minimal requirements")
             requirements = ["google-cloud-aiplatform[adk,agent_engines]"]
         
+        # teams_agent imports team_agent_a2a.shared (HTTP transport, caches, retry...),
+        # so that package has to be uploaded alongside the agent
+        extra_packages = ["team_agent_a2a/__init__.py", "team_agent_a2a/shared"]
+        logger.info(f"✓ Extra packages to upload: {extra_packages}")
+        
         # Prepare environment variables for deployment
         # Note: GOOGLE_CLOUD_PROJECT and GOOGLE_CLOUD_LOCATION are automatically set by Agent Engine
         env_vars = {
@@ -113,6 +118,7 @@ def main():
             display_name="Agentic Oferta Contextualizada",
             description="Multi-agent system for business opportunities using ADK with A2A protocol integration",
             requirements=requirements,
+            extra_packages=extra_packages,
             env_vars=env_vars
         )
         
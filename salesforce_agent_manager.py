@@ -1,12 +1,14 @@
-import requests
 import time
 import os
 import uuid
 import base64
 import json
 from typing import Dict, Optional
+import httpx
 from dotenv import load_dotenv
 
+from team_agent_a2a.shared.http_transport import get_http_transport
+
 load_dotenv()
 
 
@@ -142,7 +144,8 @@ class SalesforceAgentManager:
             
             try:
                 print(f"🚀 Sending message to '{agent_name}' (contextId: {context_id})")
-                response = requests.post(agent_url, headers=headers, json=payload)
+                client = get_http_transport().sync_client_for(agent_url)
+                response = client.post(agent_url, headers=headers, json=payload)
                 
                 # Check for context expiration error (500 with "not found (404)" in error message)
                 if response.status_code == 500 and attempt < max_retries:
@@ -189,7 +192,7 @@ class SalesforceAgentManager:
                     if attempt == max_retries:
                         return None
                     
-            except requests.exceptions.RequestException as e:
+            except httpx.HTTPError as e:
                 if attempt < max_retries:
                     print(f"🔄 Request failed (attempt {attempt + 1}/{max_retries + 1}): {e}")
                     # Try creating a new context on request errors
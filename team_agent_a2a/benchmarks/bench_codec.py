@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: shared codec vs. the json-module serialization it replaced.
+
+Run from team_agent_a2a/:  python benchmarks/bench_codec.py [--events 2000] [--repeat 5]
+
+Covers the three hot spots of an A2A exchange:
+  * server ``stream_generator``: one NDJSON line per event (status/artifact updates)
+  * client ``message/send``: building the JSON-RPC envelope for each call
+  * server ``handle_message``: debug-logging the request body
+
+Events are pydantic models when pydantic is installed (as in the servers),
+plain dicts otherwise. Force a backend with JSON_CODEC=orjson|msgspec|json.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared import codec  # noqa: E402
+
+try:
+    from pydantic import BaseModel, ConfigDict
+    from pydantic.alias_generators import to_camel
+except ImportError:  # pragma: no cover - dict-only run
+    BaseModel = None
+
+
+def make_events(count: int):
+    """Alternating working-status and artifact-update events shaped like the a2a-sdk ones."""
+    words = "produto oferta TV aberta mídia avulsa praça nacional cota disponível investimento".split()
+    rng = random.Random(42)
+    events = []
+    for i in range(count):
+        text = " ".join(rng.choices(words, k=40))
+        if i % 2:
+            events.append({
+                "kind": "artifact-update", "taskId": f"task-{i}", "contextId": "ctx-1",
+                "artifact": {"artifactId": f"art-{i}", "name": "partial_response",
+                             "parts": [{"kind": "text", "text": text}]},
+                "append": True, "lastChunk": False,
+            })
+        else:
+            events.append({
+                "kind": "status-update", "taskId": f"task-{i}", "contextId": "ctx-1", "final": False,
+                "status": {"state": "working", "message": {
+                    "kind": "message", "role": "agent", "messageId": f"msg-{i}",
+                    "parts": [{"kind": "text", "text": text}]}},
+            })
+    return events
+
+
+if BaseModel is not None:
+    class _Model(BaseModel):
+        model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+    class Part(_Model):
+        kind: str
+        text: str
+
+    class Message(_Model):
+        kind: str
+        role: str
+        message_id: str
+        parts: list[Part]
+        metadata: dict | None = None
+
+    class Status(_Model):
+        state: str
+        message: Message | None = None
+        timestamp: str | None = None
+
+    class Artifact(_Model):
+        artifact_id: str
+        name: str | None = None
+        parts: list[Part]
+        metadata: dict | None = None
+
+    class StatusUpdate(_Model):
+        kind: str
+        task_id: str
+        context_id: str
+        final: bool
+        status: Status
+        metadata: dict | None = None
+
+    class ArtifactUpdate(_Model):
+        kind: str
+        task_id: str
+        context_id: str
+        artifact: Artifact
+        append: bool | None = None
+        last_chunk: bool | None = None
+        metadata: dict | None = None
+
+    def as_models(events):
+        return [(ArtifactUpdate if "artifact" in e else StatusUpdate).model_validate(e) for e in events]
+
+
+# --- stream_generator -----------------------------------------------------------
+
+def legacy_event_lines(events) -> int:
+    """model_dump -> json.dumps -> str line (Starlette then encodes it)."""
+    total = 0
+    for event in events:
+        event_dict = event.model_dump(by_alias=True, exclude_none=True) if hasattr(event, "model_dump") else event
+        total += len((json.dumps(event_dict) + "\n").encode("utf-8"))
+    return total
+
+
+def codec_event_lines(events) -> int:
+    total = 0
+    for event in events:
+        total += len(codec.encode_event(event))
+    return total
+
+
+# --- message/send envelope ----------------------------------------------------------
+
+def legacy_envelopes(messages) -> int:
+    total = 0
+    for text, context_id, message_id in messages:
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "message/send",
+            "params": {
+                "contextId": context_id,
+                "message": {
+                    "role": "user",
+                    "parts": [{"kind": "text", "text": text}],
+                    "contextId": context_id,
+                    "messageId": message_id,
+                },
+                "metadata": {},
+            },
+        }
+        total += len(json.dumps(payload).encode("utf-8"))  # what httpx does with json=
+    return total
+
+
+def codec_envelopes(messages) -> int:
+    total = 0
+    for text, context_id, message_id in messages:
+        total += len(codec.message_send_payload(text, context_id, message_id, metadata={}))
+    return total
+
+
+# --- handle_message debug log ----------------------------------------------------------
+
+def legacy_body_log(bodies) -> int:
+    total = 0
+    for raw in bodies:
+        body = json.loads(raw)
+        total += len(f"📦 Request body: {json.dumps(body, indent=2)[:500]}")
+    return total
+
+
+def codec_body_log(bodies) -> int:
+    total = 0
+    for raw in bodies:
+        codec.loads(raw)
+        total += len(f"📦 Request body: {raw[:500].decode('utf-8', errors='replace')}")
+    return total
+
+
+def bench(fn, data, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    if BaseModel is not None:
+        events = as_models(events)
+    rng = random.Random(7)
+    messages = [
+        (f"Verifique o produto {rng.randint(1, 10**6)} na praça São Paulo", f"ctx-{uuid.uuid4()}", f"msg-{uuid.uuid4()}")
+        for _ in range(args.events)
+    ]
+    bodies = [codec.message_send_payload(*m, metadata={}) for m in messages]
+
+    # Sanity: the new encoders produce the same documents as the old ones
+    sample = events[0].model_dump(by_alias=True, exclude_none=True) if BaseModel is not None else events[0]
+    assert json.loads(codec.encode_event(events[0])) == sample
+    assert json.loads(bodies[0]) == json.loads(json.dumps({
+        "jsonrpc": "2.0", "id": 1, "method": "message/send",
+        "params": {"contextId": messages[0][1], "message": {
+            "role": "user", "parts": [{"kind": "text", "text": messages[0][0]}],
+            "contextId": messages[0][1], "messageId": messages[0][2]}, "metadata": {}},
+    }))
+
+    print(f"{args.events} items, codec backend: {codec.BACKEND}, events as {'pydantic models' if BaseModel else 'dicts'}")
+    print(f"{'hot spot':<22} {'implementation':<10} {'best (ms)':>10} {'µs/item':>8}")
+    for label, legacy, new, data in (
+        ("stream_generator", legacy_event_lines, codec_event_lines, events),
+        ("message/send body", legacy_envelopes, codec_envelopes, messages),
+        ("request body log", legacy_body_log, codec_body_log, bodies),
+    ):
+        for name, fn in (("legacy", legacy), ("codec", new)):
+            seconds = bench(fn, data, args.repeat)
+            print(f"{label:<22} {name:<10} {seconds * 1000:>10.2f} {seconds * 1e6 / len(data):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
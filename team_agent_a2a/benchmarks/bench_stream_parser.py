@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: shared StreamParser vs. the hand-rolled stream parsers it replaced.
+
+Run from team_agent_a2a/:  python benchmarks/bench_stream_parser.py [--events 2000] [--repeat 5]
+
+Payloads mimic a reasoning-engine streamQuery answer (ADK events with text
+parts) as SSE (``data:`` frames) and as NDJSON, delivered in random chunk sizes.
+"""
+import argparse
+import json
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.stream_parser import StreamParser, event_texts, orjson  # noqa: E402
+
+
+def make_events(count: int):
+    words = "produto oferta TV aberta mídia avulsa praça nacional cota disponível investimento".split()
+    rng = random.Random(42)
+    return [
+        {
+            "content": {"role": "model", "parts": [{"text": " ".join(rng.choices(words, k=12)) + "\n"}]},
+            "author": "datastore_agent",
+            "id": f"evt-{i}",
+        }
+        for i in range(count)
+    ]
+
+
+def encode(events, sse: bool) -> bytes:
+    lines = []
+    for event in events:
+        record = json.dumps(event, ensure_ascii=False)
+        lines.append(f"data: {record}\n\n" if sse else f"{record}\n")
+    return "".join(lines).encode("utf-8")
+
+
+def chunked(payload: bytes, seed: int = 7):
+    rng = random.Random(seed)
+    chunks, pos = [], 0
+    while pos < len(payload):
+        size = rng.randint(256, 4096)
+        chunks.append(payload[pos:pos + size])
+        pos += size
+    return chunks
+
+
+# --- Previous implementations -------------------------------------------------
+
+def legacy_vertex_search(chunks) -> str:
+    """vertex_search / data_and_ai: iter_lines + json.loads per line + string +=."""
+    response_text = ""
+    for line in b"".join(chunks).split(b"\n"):  # requests' iter_lines
+        if line:
+            line_str = line.decode("utf-8").strip()
+            if line_str:
+                try:
+                    json_data = json.loads(line_str)
+                    if "content" in json_data and "parts" in json_data["content"]:
+                        for part in json_data["content"]["parts"]:
+                            if "text" in part:
+                                response_text += part["text"]
+                except json.JSONDecodeError:
+                    continue
+    return response_text
+
+
+def legacy_remote_agent(chunks) -> int:
+    """RemoteAgentConnections.send_message: aiter_lines + json.loads + json.dumps(indent=2) debug string."""
+    records = 0
+    for line in b"".join(chunks).decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        try:
+            event = json.loads(line)
+            _ = f"📥 Stream line received: {json.dumps(event, indent=2)[:200]}"
+            records += 1
+        except json.JSONDecodeError:
+            continue
+    return records
+
+
+# --- Shared parser --------------------------------------------------------------
+
+def shared_parser(chunks) -> str:
+    parser = StreamParser()
+    texts = []
+    for chunk in chunks:
+        for event in parser.feed(chunk):
+            texts.extend(event_texts(event))
+    for event in parser.close():
+        texts.extend(event_texts(event))
+    return "".join(texts)
+
+
+def bench(fn, chunks, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(chunks)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    expected = "".join(e["content"]["parts"][0]["text"] for e in events)
+    print(f"{args.events} events, JSON backend: {'orjson' if orjson else 'json'}")
+    print(f"{'payload':<8} {'implementation':<24} {'best (ms)':>10} {'µs/event':>9}  complete")
+    for label, sse in (("ndjson", False), ("sse", True)):
+        chunks = chunked(encode(events, sse))
+        for name, fn in (
+            ("legacy vertex_search", legacy_vertex_search),
+            ("legacy remote_agent", legacy_remote_agent),
+            ("StreamParser", shared_parser),
+        ):
+            seconds, result = bench(fn, chunks, args.repeat)
+            if isinstance(result, str):
+                complete = "yes" if result == expected else f"no ({len(result)}/{len(expected)} chars)"
+            else:
+                complete = "yes" if result == len(events) else f"no ({result}/{len(events)} records)"
+            print(f"{label:<8} {name:<24} {seconds * 1000:>10.2f} {seconds * 1e6 / len(events):>9.2f}  {complete}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,13 @@ import logging
 import asyncio
 import sys
 import os
+from typing import Optional
 
 # Add parent directory to path for shared imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from shared.status_manager import StatusManager
+from shared.streaming import PartialTextRelay, partial_output
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events.event_queue import EventQueue
 from a2a.server.tasks import TaskUpdater
@@ -60,43 +62,73 @@ class DataAIAgentExecutor(AgentExecutor):
             user_message = genai_types.UserContent(parts=parts_text_list)
             self.logger.info(f"User message processed: {parts_text_list[0][:100] if parts_text_list else 'empty'}...")
             
+            # Partial tool output (e.g. search results while they stream in) is relayed
+            # as incremental updates of a "partial_response" artifact
+            partial_artifact_id = f"{context.task_id}-partial"
+
+            async def send_partial(text: str, first: bool, source: Optional[str] = None):
+                await updater.add_artifact(
+                    [Part(root=TextPart(text=text))],
+                    artifact_id=partial_artifact_id,
+                    name="partial_response",
+                    append=not first,
+                    last_chunk=False,
+                )
+
+            async def close_partial():
+                # An empty last chunk tells clients the partial artifact is complete
+                await updater.add_artifact(
+                    [Part(root=TextPart(text=""))],
+                    artifact_id=partial_artifact_id,
+                    name="partial_response",
+                    append=True,
+                    last_chunk=True,
+                )
+
+            relay = PartialTextRelay(send_partial)
+
             self.logger.info("Starting runner.run_async to get agent response")
-            async for event in self.runner.run_async(
-                new_message=user_message,
-                session_id=context.context_id,
-                user_id=DEFAULT_USER_ID
-            ):
-                event_description = f"final_response={event.is_final_response()}"
-                if event.content and event.content.parts:
-                    has_tool_call = any(part.function_call for part in event.content.parts)
-                    event_description += f", has_tool_call={has_tool_call}"
-                self.logger.info(f"Event received from runner: {event_description}")
-                
-                if not event.content or not event.content.parts:
-                    self.logger.warning("Event received without content or parts, skipping")
-                    continue
-
-                for part in event.content.parts:
-                    if part.function_call:
-                        tool_name = part.function_call.name
-                        status_text = f"Executing search tool: '{tool_name}'..."
-                        self.logger.info(f"Sending status: {status_text}")
-                        status_message = new_agent_text_message(status_text, context.context_id, context.task_id)
-                        status_manager.send_update(TaskState.working, message=status_message)
-                
-                if event.is_final_response():
-                    self.logger.info("Final response event detected")
-                    final_text_parts = [part.text for part in event.content.parts if part.text]
+            with partial_output(relay):
+                async for event in self.runner.run_async(
+                    new_message=user_message,
+                    session_id=context.context_id,
+                    user_id=DEFAULT_USER_ID
+                ):
+                    # Anything a tool streamed so far goes out before this event is handled
+                    await relay.flush()
+                    event_description = f"final_response={event.is_final_response()}"
+                    if event.content and event.content.parts:
+                        has_tool_call = any(part.function_call for part in event.content.parts)
+                        event_description += f", has_tool_call={has_tool_call}"
+                    self.logger.info(f"Event received from runner: {event_description}")
+                    
+                    if not event.content or not event.content.parts:
+                        self.logger.warning("Event received without content or parts, skipping")
+                        continue
+
+                    for part in event.content.parts:
+                        if part.function_call:
+                            tool_name = part.function_call.name
+                            status_text = f"Executing search tool: '{tool_name}'..."
+                            self.logger.info(f"Sending status: {status_text}")
+                            status_message = new_agent_text_message(status_text, context.context_id, context.task_id)
+                            status_manager.send_update(TaskState.working, message=status_message)
                     
-                    if final_text_parts:
-                        final_text = " ".join(final_text_parts)
-                        self.logger.info(f"Final response received: {final_text[:200]}...")
+                    if event.is_final_response():
+                        self.logger.info("Final response event detected")
+                        final_text_parts = [part.text for part in event.content.parts if part.text]
                         
-                        final_parts = [Part(root=TextPart(text=final_text))]
-                        self.logger.info("Adding final_response artifact")
-                        await updater.add_artifact(final_parts, name="final_response")
-                        self.logger.info("Artifact added successfully")
-                        break
+                        if final_text_parts:
+                            final_text = " ".join(final_text_parts)
+                            self.logger.info(f"Final response received: {final_text[:200]}...")
+                            
+                            final_parts = [Part(root=TextPart(text=final_text))]
+                            if relay.chunks_sent:
+                                await close_partial()
+                            self.logger.info("Adding final_response artifact")
+                            await updater.add_artifact(final_parts, name="final_response")
+                            self.logger.info("Artifact added successfully")
+                            break
 
             self.logger.info("Sending final 'completed' status...")
             await updater.update_status(TaskState.completed, final=True)
@@ -1,12 +1,16 @@
 """Tools for Data AI Agent - Vertex AI Search integration"""
 import logging
 import os
-import json
-import google.auth
-import google.auth.transport.requests
-import requests
+import httpx
 from google.adk.tools import FunctionTool
 
+from shared.cache import StaleWhileRevalidate, cache_from_env
+from shared.discovery_search import format_documents, get_discovery_search
+from shared.reasoning_engine import ReasoningEngineError, get_reasoning_engine_client
+from shared.session_pool import session_pool_from_env
+from shared.streaming import emit_partial
+from shared.utils import normalize_query
+
 logger = logging.getLogger(__name__)
 
 # Configuration from environment  
@@ -15,18 +19,26 @@ LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
 # Use the WORKING datastore agent ID from teams_agent
 DATASTORE_AGENT_ID = "4757723152828596224"  # Datastore Agent with Sources (WORKING!)
 
-logger.info(f"Vertex Search Tool configured: project={PROJECT_ID}, location={LOCATION}, datastore={DATASTORE_AGENT_ID}")
+# "agent" asks the datastore LLM agent; "direct" queries the datastore through the
+# Discovery Engine API, skipping one model round trip and one network hop
+VERTEX_SEARCH_MODE = os.getenv("VERTEX_SEARCH_MODE", "agent").lower()
 
-def get_google_token():
-    """Get Google Cloud authentication token"""
-    try:
-        credentials, project = google.auth.default()
-        auth_req = google.auth.transport.requests.Request()
-        credentials.refresh(auth_req)
-        return credentials.token
-    except Exception as e:
-        logger.error(f"Failed to get Google Cloud token: {e}")
-        return None
+logger.info(f"Vertex Search Tool configured: project={PROJECT_ID}, location={LOCATION}, datastore={DATASTORE_AGENT_ID}, mode={VERTEX_SEARCH_MODE}")
+
+# Async client of the datastore reasoning engine (pooled, never blocks the event loop)
+_engine = get_reasoning_engine_client(DATASTORE_AGENT_ID, PROJECT_ID, LOCATION)
+
+# Pre-created datastore sessions, recycled after a few queries so their history stays small
+_sessions = session_pool_from_env(_engine, "data_ai_agent", "DATASTORE_SESSION")
+
+# Datastore offers change rarely - cache search answers by normalized query
+_search_cache = cache_from_env(f"vertex_search_{VERTEX_SEARCH_MODE}", "VERTEX_SEARCH_CACHE", ttl=3600, max_entries=256, persistent=True)
+_search_lookup = StaleWhileRevalidate(_search_cache)
+
+def warm_up_sessions():
+    """Pre-create datastore sessions; called when the A2A server starts."""
+    if VERTEX_SEARCH_MODE == "agent":
+        _sessions.warm()
 
 async def vertex_search(query: str) -> str:
     """
@@ -42,65 +54,27 @@ async def vertex_search(query: str) -> str:
     if not text:
         return "Please provide search criteria (segment, time period, investment, location, etc.)"
     
+    search = _vertex_search_direct if VERTEX_SEARCH_MODE == "direct" else _vertex_search_uncached
+    return await _search_lookup.get(
+        normalize_query(text),
+        lambda: search(text),
+        should_cache=lambda response: response.startswith("I found"),
+    )
+
+async def _vertex_search_uncached(text: str) -> str:
+    """Run the datastore agent search for ``text`` (no caching)."""
     try:
         logger.info(f"🔍 Vertex AI Search: {text[:100]}{'...' if len(text) > 100 else ''}")
         
-        # Get authentication token
-        token = get_google_token()
-        if not token:
-            return "Error: Could not authenticate with Google Cloud"
-        
-        # Vertex AI Search endpoint
-        base_url = f"https://{LOCATION}-aiplatform.googleapis.com/v1"
-        search_url = f"{base_url}/projects/{PROJECT_ID}/locations/{LOCATION}/reasoningEngines/{DATASTORE_AGENT_ID}:query"
-        
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-        
-        # Create session first
-        session_payload = {
-            "class_method": "create_session",
-            "input": {"user_id": "data_ai_agent"}
-        }
-        
-        logger.debug(f"Creating session with datastore agent {DATASTORE_AGENT_ID}")
-        session_response = requests.post(search_url, headers=headers, json=session_payload, timeout=30)
-        session_response.raise_for_status()
-        session_data = session_response.json()
-        session_id = session_data["output"]["id"]
-        logger.debug(f"Session created: {session_id}")
-        
-        # Query with streaming
-        stream_url = f"{base_url}/projects/{PROJECT_ID}/locations/{LOCATION}/reasoningEngines/{DATASTORE_AGENT_ID}:streamQuery?alt=sse"
-        query_payload = {
-            "class_method": "stream_query",
-            "input": {
-                "user_id": "data_ai_agent",
-                "session_id": session_id,
-                "message": f"Buscar produtos com os seguintes critérios: {text}"
-            }
-        }
-        
-        logger.debug(f"Executing search query")
-        query_response = requests.post(stream_url, headers=headers, json=query_payload, timeout=60, stream=True)
-        query_response.raise_for_status()
-        
-        # Parse streaming response
-        response_text = ""
-        for line in query_response.iter_lines():
-            if line:
-                line_str = line.decode('utf-8').strip()
-                if line_str:
-                    try:
-                        json_data = json.loads(line_str)
-                        if "content" in json_data and "parts" in json_data["content"]:
-                            for part in json_data["content"]["parts"]:
-                                if "text" in part:
-                                    response_text += part["text"]
-                    except json.JSONDecodeError:
-                        continue
+        # Take a ready session from the pool and stream the query - non-blocking on the pooled client
+        async with _sessions.session() as session_id:
+            logger.debug(f"Executing search query on datastore session {session_id}")
+            response_text = await _engine.stream_query_text(
+                "data_ai_agent",
+                session_id,
+                f"Buscar produtos com os seguintes critérios: {text}",
+                on_chunk=emit_partial,  # relayed to the A2A client as partial results
+            )
         
         if response_text.strip():
             logger.info(f"✅ Search completed: {len(response_text)} characters")
@@ -111,16 +85,34 @@ async def vertex_search(query: str) -> str:
         logger.warning("Search returned no results")
         return "No products found matching the search criteria. Try different keywords or criteria."
         
-    except requests.exceptions.Timeout:
+    except ReasoningEngineError:
+        return "Error: Could not authenticate with Google Cloud"
+    except httpx.TimeoutException:
         logger.error("Timeout while querying Vertex AI Search")
         return "Error: Search request timed out. Please try again."
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"HTTP error while querying Vertex AI Search: {e}")
         return f"Error: Failed to search - {str(e)}"
     except Exception as e:
         logger.error(f"Unexpected error in vertex_search: {e}", exc_info=True)
         return f"Error: Unexpected error occurred - {str(e)}"
 
+async def _vertex_search_direct(text: str) -> str:
+    """Query the datastore directly through the Discovery Engine API (no caching)."""
+    try:
+        logger.info(f"🔍 Vertex AI Search (direct): {text[:100]}{'...' if len(text) > 100 else ''}")
+        documents = await get_discovery_search().search(text)
+        if documents:
+            logger.info(f"✅ Direct search completed: {len(documents)} documents")
+            return f"I found the following products:\n\n{format_documents(documents)}"
+        
+        logger.warning("Direct search returned no results")
+        return "No products found matching the search criteria. Try different keywords or criteria."
+        
+    except Exception as e:
+        logger.error(f"Error in direct vertex_search: {e}", exc_info=True)
+        return f"Error: Failed to search - {str(e)}"
+
 # Create ADK FunctionTool instance
 vertex_search_tool = FunctionTool(func=vertex_search)
 
@@ -2,8 +2,11 @@
 import logging
 import os
 import asyncio
+import time
+from collections import Counter
+from typing import List, Optional
 from google.adk.agents import Agent
-from google.adk.tools import FunctionTool
+from google.adk.tools import FunctionTool, ToolContext
 
 # Configure ADK for Vertex AI
 from orchestrator.config import configure_adk_for_vertexai
@@ -11,13 +14,51 @@ configure_adk_for_vertexai()
 
 from orchestrator import prompts
 from orchestrator.remote_agent_connection import get_remote_connections
+from orchestrator.progress import ProgressStreamingAgent
 
 logger = logging.getLogger(__name__)
 
 # Global remote connections instance
 _connections = None
 
-async def send_message_to_agent(agent_name: str, message: str) -> str:
+# Shared deadline of a send_messages_parallel call
+PARALLEL_SEND_DEADLINE = float(os.getenv("ORCHESTRATOR_PARALLEL_DEADLINE", "90"))
+
+def warm_up_remote_agents(callback_context=None):
+    """
+    Start remote agent discovery in the background.
+    
+    Runs at import and as the coordinator's before_agent_callback, so agent
+    cards are fetched while the coordinator model is still planning rather
+    than when the first message is sent.
+    """
+    global _connections
+    if _connections is None:
+        _connections = get_remote_connections()
+    try:
+        _connections.start()
+    except RuntimeError:
+        # No running event loop yet (plain import); the first turn starts it
+        logger.debug("Remote agent warm-up deferred until an event loop is running")
+    return None
+
+async def _get_connections():
+    """Initialize connections if needed (no-op once discovery has completed)"""
+    global _connections
+    if _connections is None:
+        _connections = get_remote_connections()
+    await _connections.initialize()
+    return _connections
+
+def _session_key(tool_context: Optional[ToolContext]) -> Optional[str]:
+    """Identify the ADK session a tool call belongs to"""
+    invocation_context = getattr(tool_context, "_invocation_context", None)
+    session = getattr(invocation_context, "session", None)
+    if session is None:
+        return None
+    return f"{session.app_name}:{session.user_id}:{session.id}"
+
+async def send_message_to_agent(agent_name: str, message: str, tool_context: ToolContext = None) -> str:
     """
     Send a message to a remote A2A agent.
     
@@ -28,16 +69,15 @@ async def send_message_to_agent(agent_name: str, message: str) -> str:
     Returns:
         Response from the remote agent
     """
-    global _connections
-    
     try:
-        # Initialize connections if needed
-        if _connections is None:
-            _connections = get_remote_connections()
-            await _connections.initialize()
+        connections = await _get_connections()
+        
+        # Follow-ups in the same conversation reuse the agent's remote context
+        session_key = _session_key(tool_context)
+        context_id = connections.context_id_for(session_key, agent_name) if session_key else None
         
         logger.info(f"📨 Sending message to {agent_name}")
-        response = await _connections.send_message(agent_name, message)
+        response = await connections.send_message(agent_name, message, context_id=context_id)
         logger.info(f"✅ Received response from {agent_name}: {len(response)} chars")
         return response
         
@@ -45,8 +85,72 @@ async def send_message_to_agent(agent_name: str, message: str) -> str:
         logger.error(f"Error in send_message_to_agent: {e}", exc_info=True)
         return f"Error communicating with {agent_name}: {str(e)}"
 
-# Create send_message tool
+async def send_messages_parallel(agent_names: List[str], messages: List[str], tool_context: ToolContext = None) -> dict:
+    """
+    Send messages to several remote A2A agents at the same time.
+    
+    Args:
+        agent_names: Agent of each message (e.g., ["Data AI Agent", "Product Search Agent"])
+        messages: Message for each agent, in the same order as agent_names
+        
+    Returns:
+        Results keyed by agent name, each with a status ("ok", "error" or "timeout")
+        and the agent's response; agents that miss the shared deadline are reported
+        as "timeout" while the others' responses are still returned
+    """
+    if not agent_names or len(agent_names) != len(messages or []):
+        return {"error": "agent_names and messages must be non-empty lists of the same length"}
+    
+    try:
+        connections = await _get_connections()
+    except Exception as e:
+        logger.error(f"Error in send_messages_parallel: {e}", exc_info=True)
+        return {"error": f"Error communicating with remote agents: {str(e)}"}
+    
+    # Results are keyed by agent; repeated agents get a numbered key
+    seen = Counter()
+    keys = []
+    for agent_name in agent_names:
+        seen[agent_name] += 1
+        keys.append(agent_name if seen[agent_name] == 1 else f"{agent_name} #{seen[agent_name]}")
+    
+    # Each agent's first message continues its remote context; repeats of the
+    # same agent run concurrently, so they get a fresh context of their own
+    session_key = _session_key(tool_context)
+    context_ids = [
+        connections.context_id_for(session_key, agent_name) if session_key and key == agent_name else None
+        for key, agent_name in zip(keys, agent_names)
+    ]
+    
+    logger.info(f"📨 Sending {len(keys)} messages in parallel (deadline {PARALLEL_SEND_DEADLINE:g}s)")
+    start = time.monotonic()
+    tasks = {
+        key: asyncio.create_task(connections.send_message(agent_name, message, context_id=context_id))
+        for key, agent_name, message, context_id in zip(keys, agent_names, messages, context_ids)
+    }
+    done, pending = await asyncio.wait(tasks.values(), timeout=PARALLEL_SEND_DEADLINE)
+    for task in pending:
+        task.cancel()
+    
+    results = {}
+    for key, task in tasks.items():
+        if task in pending:
+            results[key] = {"status": "timeout", "response": f"Sem resposta dentro do prazo de {PARALLEL_SEND_DEADLINE:g}s"}
+        elif task.exception() is not None:
+            results[key] = {"status": "error", "response": f"Error communicating with {key}: {task.exception()}"}
+        else:
+            response = task.result()
+            status = "error" if response.startswith('{"error"') else "ok"
+            results[key] = {"status": status, "response": response}
+    logger.info(
+        f"✅ Parallel send finished in {time.monotonic() - start:.2f}s "
+        f"({sum(r['status'] == 'ok' for r in results.values())}/{len(results)} ok)"
+    )
+    return results
+
+# Create send_message tools
 send_message_tool = FunctionTool(func=send_message_to_agent)
+send_messages_parallel_tool = FunctionTool(func=send_messages_parallel)
 
 def create_orchestrator():
     """Create the orchestrator agent with 2-level hierarchy"""
@@ -55,13 +159,14 @@ def create_orchestrator():
     model = os.getenv("MODEL") or os.getenv("ADK_MODEL", "gemini-2.5-flash")
     
     # Sub-agent: ContextualizedOfferAgent
-    # This agent uses send_message tool to communicate with remote A2A agents
-    contextualized_offer_agent = Agent(
+    # This agent uses send_message tool to communicate with remote A2A agents;
+    # their progress is streamed to the user while the tool waits
+    contextualized_offer_agent = ProgressStreamingAgent(
         name="ContextualizedOfferAgent",
         model=model,
         description="Creates contextualized offers by querying remote A2A agents for product information",
         instruction=prompts.CONTEXTUALIZED_OFFER_AGENT_PROMPT,
-        tools=[send_message_tool],
+        tools=[send_message_tool, send_messages_parallel_tool],
     )
     
     # Root agent: Coordinator
@@ -71,14 +176,16 @@ def create_orchestrator():
         description="Coordinates offer creation and routes to sub-agents",
         instruction=prompts.COORDINATOR_PROMPT,
         sub_agents=[contextualized_offer_agent],
+        before_agent_callback=warm_up_remote_agents,
     )
     
     logger.info(f"✅ Orchestrator created with model: {model}")
     logger.info(f"   - Coordinator Agent")
-    logger.info(f"   - ContextualizedOfferAgent (with send_message tool)")
+    logger.info(f"   - ContextualizedOfferAgent (with send_message and send_messages_parallel tools)")
     
     return coordinator_agent
 
 # Create root agent instance
 root_agent = create_orchestrator()
+warm_up_remote_agents()
 
@@ -0,0 +1,101 @@
+"""Streaming of remote agent progress to the end user.
+
+While a send_message tool waits on a remote agent, ``RemoteAgentConnections``
+forwards the agent's working status updates and partial artifacts through
+``emit_partial``. ``ProgressStreamingAgent`` installs the relay for its run
+and yields what arrives as partial ADK events, so the user sees progress
+within about a second instead of only the final answer. Every progress
+event comes from a single remote agent, named in its ``custom_metadata``
+(``source_agent``) and in an ``[agent]`` label whenever the source changes,
+so the output of parallel sends stays attributable.
+"""
+import asyncio
+import logging
+import os
+from contextlib import aclosing
+from typing import AsyncGenerator, List, Optional, Tuple
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.genai import types
+
+from shared.streaming import PartialTextRelay, partial_output
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_MIN_CHARS = int(os.getenv("ORCHESTRATOR_PROGRESS_MIN_CHARS", "80"))
+PROGRESS_INTERVAL = float(os.getenv("ORCHESTRATOR_PROGRESS_INTERVAL", "0.5"))
+
+
+class ProgressStreamingAgent(LlmAgent):
+    """
+    LlmAgent that surfaces remote progress emitted by its tools as partial events.
+
+    The agent's own run happens in a helper task so progress can be yielded
+    while a tool call is pending; each of its events is handed over one at a
+    time and the helper only continues once the runner has processed it, so
+    session ordering is the same as for a plain LlmAgent. Partial events are
+    streamed to the client but not stored in the session.
+    """
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        queue: asyncio.Queue = asyncio.Queue()
+        progress: List[Tuple[str, Optional[str]]] = []
+        labelled_source: Optional[str] = None  # source named by the last label
+
+        async def send(text: str, first: bool, source: Optional[str] = None):
+            progress.append((text, source))
+            queue.put_nowait(("progress", None, None))
+
+        relay = PartialTextRelay(send, min_chars=PROGRESS_MIN_CHARS, min_interval=PROGRESS_INTERVAL)
+        loop = asyncio.get_running_loop()
+
+        async def run_agent():
+            try:
+                async with aclosing(LlmAgent._run_async_impl(self, ctx)) as events:
+                    async for event in events:
+                        consumed = loop.create_future()
+                        queue.put_nowait(("event", event, consumed))
+                        # Wait until the runner has handled it (e.g. appended it to the session)
+                        await consumed
+            finally:
+                queue.put_nowait(("done", None, None))
+
+        # The task copies the current context, so tools running in it see the relay
+        with partial_output(relay):
+            task = asyncio.create_task(run_agent())
+        try:
+            while True:
+                try:
+                    kind, event, consumed = await asyncio.wait_for(queue.get(), PROGRESS_INTERVAL)
+                except asyncio.TimeoutError:
+                    kind, event, consumed = "tick", None, None
+                # Forward buffered progress before the agent's next event
+                await relay.flush()
+                while progress:
+                    text, source = progress.pop(0)
+                    if source and source != labelled_source:
+                        labelled_source = source
+                        text = f"\n[{source}]\n{text}"
+                    yield self._progress_event(ctx, text, source)
+                if kind == "event":
+                    yield event
+                    consumed.set_result(None)
+                elif kind == "done":
+                    break
+            # Re-raise whatever ended the agent's run
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+
+    def _progress_event(self, ctx: InvocationContext, text: str, source: Optional[str]) -> Event:
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            partial=True,
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            custom_metadata={"source_agent": source} if source else None,
+        )
@@ -2,69 +2,340 @@
 import logging
 import os
 import asyncio
-import json
-from typing import Dict, Optional
+import time
+import uuid
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 import httpx
 
+from shared.agent_card import AgentCardClient
+from shared.cache import cache_from_env
+from shared.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from shared.health import HealthChecker
+from shared.http_transport import RemoteStatusError, get_http_transport
+from shared.load_balancer import Replica, ReplicaSet
+from shared.stream_parser import StreamParser, aiter_records
+from shared.streaming import emit_partial
+from shared.codec import dumps, message_send_payload
+
 logger = logging.getLogger(__name__)
 
+# Discovery of the agents listed in REMOTE_AGENT_ADDRESSES
+DISCOVERY_TIMEOUT = float(os.getenv("REMOTE_AGENT_DISCOVERY_TIMEOUT", "5"))
+DISCOVERY_REFRESH_INTERVAL = float(os.getenv("REMOTE_AGENT_REFRESH_INTERVAL", "60"))
+DISCOVERY_RETRY_MIN = float(os.getenv("REMOTE_AGENT_RETRY_MIN", "2"))
+DISCOVERY_RETRY_MAX = float(os.getenv("REMOTE_AGENT_RETRY_MAX", "60"))
+
+# How long an idle conversation keeps its remote contextId (and replica)
+CONTEXT_TTL = 1800
+
+# How long to keep reading the rest of a stream after its final_response, so the
+# keep-alive connection goes back to the pool instead of being discarded
+STREAM_DRAIN_TIMEOUT = float(os.getenv("REMOTE_AGENT_STREAM_DRAIN_TIMEOUT", "2"))
+
+# A2A task states after which no final_response artifact will follow
+TERMINAL_TASK_STATES = {"completed", "failed", "canceled", "rejected", "input-required", "auth-required"}
+
+
+def _text_of(parts: Optional[list]) -> str:
+    """Join the text parts of an A2A message or artifact."""
+    return "".join(part['text'] for part in parts or [] if isinstance(part, dict) and part.get('text'))
+
+
+@dataclass
+class _AddressState:
+    """Discovery state of one configured agent address."""
+    agent_name: Optional[str] = None
+    failures: int = 0
+    next_attempt: float = 0.0
+    last_error: Optional[str] = None
+
+
 class RemoteAgentConnections:
     """Manages connections to remote A2A agents"""
     
     def __init__(self):
         self.agent_cards = {}
-        self.agent_urls = {}
-        self.httpx_client = None
+        # Replicas of each agent name: addresses whose cards share a name are load balanced
+        self.replica_sets: Dict[str, ReplicaSet] = {}
+        self.transport = get_http_transport()
+        self.card_client = AgentCardClient(self.transport)
+        # Active probes: revalidating the agent card is a conditional GET, usually a bodiless 304
+        self.health = HealthChecker(lambda url: self.card_client.fetch(url, revalidate=True))
+        # (ADK session, agent) -> remote contextId, and contextId -> replica that holds its session
+        self._contexts = cache_from_env("orchestrator_contexts", "ORCHESTRATOR_CONTEXT", ttl=CONTEXT_TTL, max_entries=10000)
+        self._context_replicas = cache_from_env("orchestrator_context_replicas", "ORCHESTRATOR_CONTEXT", ttl=CONTEXT_TTL, max_entries=10000)
         self._initialized = False
         
+        remote_addresses = os.getenv('REMOTE_AGENT_ADDRESSES', '')
+        self.addresses = [addr.strip() for addr in remote_addresses.split(',') if addr.strip()]
+        self._address_state: Dict[str, _AddressState] = {url: _AddressState() for url in self.addresses}
+        self._initial_discovery: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        
+    def start(self):
+        """
+        Start discovery and health checks in the background on the running event loop.
+        
+        Fetches every agent card concurrently right away and keeps refreshing
+        them: healthy agents every ``REMOTE_AGENT_REFRESH_INTERVAL`` seconds,
+        failed ones with exponential backoff, so agents that come online later
+        are picked up without a restart. Discovered replicas are probed every
+        ``REMOTE_AGENT_HEALTH_INTERVAL`` seconds. Safe to call more than once.
+        """
+        if not self.addresses:
+            return
+        loop = asyncio.get_running_loop()
+        if self._initial_discovery is None:
+            logger.info(f"Discovering {len(self.addresses)} remote agents...")
+            self._initial_discovery = loop.create_task(self._discover_initial())
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = loop.create_task(self._refresh_loop())
+        self.health.start()
+        
     async def initialize(self):
-        """Discover and connect to remote A2A agents"""
+        """Discover and connect to remote A2A agents (waits for the first discovery round)"""
         if self._initialized:
             return
-            
-        # Create httpx client
-        if self.httpx_client is None:
-            self.httpx_client = httpx.AsyncClient(timeout=120.0)
-            
-        # Get remote agent addresses from environment
-        remote_addresses = os.getenv('REMOTE_AGENT_ADDRESSES', '')
-        if not remote_addresses:
+        if not self.addresses:
             logger.warning("No REMOTE_AGENT_ADDRESSES configured")
             return
-            
-        addresses = [addr.strip() for addr in remote_addresses.split(',') if addr.strip()]
-        logger.info(f"Discovering {len(addresses)} remote agents...")
+        self.start()
+        # Shielded: a cancelled caller must not cancel discovery for everyone else
+        await asyncio.shield(self._initial_discovery)
         
-        for url in addresses:
-            try:
-                logger.info(f"Fetching agent card from: {url}")
-                
-                # Fetch agent card directly
-                card_url = f"{url}/.well-known/agent-card.json"
-                response = await self.httpx_client.get(card_url)
-                
-                if response.status_code == 200:
-                    card_data = response.json()
-                    agent_name = card_data.get('name')
-                    
-                    if agent_name:
-                        self.agent_cards[agent_name] = card_data
-                        self.agent_urls[agent_name] = url
-                        logger.info(f"✅ Connected to: {agent_name} at {url}")
-                    else:
-                        logger.warning(f"⚠️  Agent card missing 'name' field from: {url}")
-                else:
-                    logger.warning(f"⚠️  Could not fetch agent card from {url}: HTTP {response.status_code}")
-                    
-            except Exception as e:
-                logger.error(f"❌ Failed to connect to {url}: {e}")
-                
+    async def _discover_initial(self):
+        await self.discover(self.addresses)
         self._initialized = True
         logger.info(f"Remote agent discovery complete. Connected to: {list(self.agent_cards.keys())}")
         
-    def get_agent_names(self) -> list:
-        """Get list of available agent names"""
-        return list(self.agent_cards.keys())
+    async def discover(self, urls: Optional[List[str]] = None):
+        """Fetch the agent cards at ``urls`` (default: every address that is due) concurrently"""
+        if urls is None:
+            now = time.monotonic()
+            urls = [url for url, state in self._address_state.items() if state.next_attempt <= now]
+        if urls:
+            await asyncio.gather(*(self._discover_one(url) for url in urls))
+        
+    async def _discover_one(self, url: str):
+        state = self._address_state[url]
+        try:
+            logger.debug(f"Fetching agent card from: {url}")
+            # Cached per URL and revalidated with If-None-Match once stale
+            card_data = await asyncio.wait_for(self.card_client.fetch(url), DISCOVERY_TIMEOUT)
+            agent_name = card_data.get('name')
+            if not agent_name:
+                raise ValueError("agent card missing 'name' field")
+        except Exception as e:
+            state.failures += 1
+            state.last_error = str(e) or type(e).__name__
+            delay = min(DISCOVERY_RETRY_MAX, DISCOVERY_RETRY_MIN * 2 ** (state.failures - 1))
+            state.next_attempt = time.monotonic() + delay
+            log = logger.warning if isinstance(e, (RemoteStatusError, asyncio.TimeoutError, ValueError)) else logger.error
+            log(f"❌ Failed to connect to {url}: {state.last_error} (retrying in {delay:g}s)")
+            return
+        
+        if state.agent_name and state.agent_name != agent_name:
+            # The address now serves a different agent
+            self._remove_replica(state.agent_name, url)
+        if state.agent_name != agent_name or state.failures:
+            logger.info(f"✅ Connected to: {agent_name} at {url}")
+        self.agent_cards[agent_name] = card_data
+        self.replica_sets.setdefault(agent_name, ReplicaSet(agent_name, is_healthy=self.health.is_healthy)).add(url)
+        self.health.track(url)
+        state.agent_name = agent_name
+        state.failures = 0
+        state.last_error = None
+        state.next_attempt = time.monotonic() + DISCOVERY_REFRESH_INTERVAL
+        
+    def _remove_replica(self, agent_name: str, url: str):
+        replicas = self.replica_sets.get(agent_name)
+        if replicas is None:
+            return
+        replicas.discard(url)
+        self.health.untrack(url)
+        if not replicas:
+            del self.replica_sets[agent_name]
+            self.agent_cards.pop(agent_name, None)
+        
+    async def _refresh_loop(self):
+        """Re-run discovery for every address as it becomes due."""
+        while True:
+            now = time.monotonic()
+            next_due = min(state.next_attempt for state in self._address_state.values())
+            await asyncio.sleep(max(1.0, next_due - now))
+            if self._initial_discovery is not None and not self._initial_discovery.done():
+                continue
+            try:
+                await self.discover()
+            except Exception as e:
+                logger.error(f"❌ Remote agent refresh failed: {e}", exc_info=True)
+        
+    def get_agent_names(self, include_unhealthy: bool = False) -> list:
+        """Get list of available agent names (those with at least one healthy replica)"""
+        return [
+            agent_name for agent_name, replicas in self.replica_sets.items()
+            if include_unhealthy or replicas.healthy_urls()
+        ]
+    
+    def get_diagnostics(self) -> Dict[str, dict]:
+        """Get health, load, circuit and discovery state of every remote agent and replica"""
+        agents = {}
+        health = self.health.get_stats()
+        for agent_name, replicas in self.replica_sets.items():
+            load = replicas.get_stats()
+            agents[agent_name] = {
+                "healthy": bool(replicas.healthy_urls()),
+                "replicas": {
+                    url: {
+                        **health.get(url, {}),
+                        **load[url],
+                        "circuit": get_circuit_breaker(url).get_stats(),
+                    }
+                    for url in replicas.urls
+                },
+            }
+        return {
+            "agents": agents,
+            "discovery": self.get_discovery_status(),
+            "agent_cards": self.card_client.get_stats(),
+        }
+    
+    def get_discovery_status(self) -> Dict[str, dict]:
+        """Get the discovery state of each configured address"""
+        now = time.monotonic()
+        return {
+            url: {
+                "agent_name": state.agent_name,
+                "failures": state.failures,
+                "last_error": state.last_error,
+                "next_attempt_in": round(max(0.0, state.next_attempt - now), 1),
+            }
+            for url, state in self._address_state.items()
+        }
+    
+    def get_circuit_states(self) -> Dict[str, dict]:
+        """Get the circuit breaker state of each replica of each remote agent"""
+        return {
+            agent_name: {url: get_circuit_breaker(url).get_stats() for url in replicas.urls}
+            for agent_name, replicas in self.replica_sets.items()
+        }
+    
+    def context_id_for(self, session_key: str, agent_name: str) -> str:
+        """
+        Return the remote contextId of ``agent_name`` for one orchestrator (ADK) session.
+        
+        The same session keeps talking to the same remote context, so the remote
+        executor reuses its ADK session and follow-ups keep their history. The
+        mapping expires after ``ORCHESTRATOR_CONTEXT_TTL`` seconds without use.
+        """
+        key = f"{session_key}|{agent_name}"
+        context_id = self._contexts.get(key)
+        if context_id is None:
+            context_id = f"ctx-{uuid.uuid4()}"
+            logger.info(f"🧵 New remote context {context_id} for {agent_name}")
+        # Re-stored on every use so the TTL counts from the last message
+        self._contexts.set(key, context_id)
+        return context_id
+    
+    async def _read_final_response(self, agent_name: str, events: AsyncIterator[Any]) -> Optional[str]:
+        """
+        Consume A2A stream events until the answer is known.
+        
+        Returns the text of the ``final_response`` artifact as soon as it arrives,
+        or the status message of a terminal status (failed, canceled, ...) that
+        ends the task without one. Working status messages and partial artifacts
+        are forwarded as progress through ``emit_partial``, tagged with
+        ``agent_name`` as their source, not kept.
+        """
+        debug = logger.isEnabledFor(logging.DEBUG)
+        async for event in events:
+            if not isinstance(event, dict):
+                continue
+            if debug:
+                logger.debug(f"📥 Stream line received: {dumps(event)[:200].decode('utf-8', errors='replace')}")
+            
+            artifact = event.get('artifact')
+            if isinstance(artifact, dict):
+                if artifact.get('name') == 'final_response':
+                    final_response = _text_of(artifact.get('parts'))
+                    logger.info(f"✅ Resultado final capturado: {len(final_response)} chars")
+                    return final_response
+                text = _text_of(artifact.get('parts'))
+                if text:
+                    await emit_partial(text, source=agent_name)
+                continue
+            
+            status = event.get('status')
+            if isinstance(status, dict) and (event.get('final') or status.get('state') in TERMINAL_TASK_STATES):
+                state = status.get('state')
+                message = _text_of((status.get('message') or {}).get('parts'))
+                logger.info(f"🏁 {agent_name} ended the task with state '{state}' before a final_response")
+                if state == 'completed':
+                    return None
+                return f"{{\"error\": \"{agent_name} terminou com estado '{state}': {message}\"}}" if message else None
+            if isinstance(status, dict) and status.get('state') == 'working':
+                message = _text_of((status.get('message') or {}).get('parts'))
+                if message:
+                    await emit_partial(f"{message}\n", source=agent_name)
+        return None
+    
+    async def _drain(self, agent_name: str, events: AsyncIterator[Any]):
+        """
+        Read what is left of a stream after its answer (usually the closing status update).
+        
+        A response closed mid-body cannot be reused, so httpx would drop the
+        connection; reading to the end returns it to the pool. Streams that keep
+        going past ``STREAM_DRAIN_TIMEOUT`` are closed anyway.
+        """
+        async def consume():
+            async for _ in events:
+                pass
+        
+        try:
+            await asyncio.wait_for(consume(), timeout=STREAM_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.debug(f"Stream from {agent_name} still open {STREAM_DRAIN_TIMEOUT}s after final_response, closing it")
+        except httpx.HTTPError as e:
+            logger.debug(f"Stream from {agent_name} ended with an error after final_response: {e}")
+    
+    def get_context_stats(self) -> Dict[str, dict]:
+        """Get the counters of the session -> contextId and contextId -> replica maps"""
+        return {
+            "contexts": self._contexts.get_stats(),
+            "context_replicas": self._context_replicas.get_stats(),
+        }
+    
+    def get_load_balancer_stats(self) -> Dict[str, dict]:
+        """Get the outstanding requests and ejection state of each replica"""
+        return {agent_name: replicas.get_stats() for agent_name, replicas in self.replica_sets.items()}
+    
+    def _choose_replica(self, replicas: ReplicaSet, preferred: Optional[str] = None) -> Tuple[Optional[Replica], Optional[float]]:
+        """
+        Pick a healthy replica whose circuit admits the call, ``preferred`` first.
+        
+        When there is none, returns the shortest retry_after among open
+        circuits, or None as retry_after when every replica is unhealthy.
+        """
+        tried = set()
+        retry_after = None
+        while True:
+            # Ejected (open circuit) replicas are only consulted once every other one was tried
+            replica = replicas.replicas.get(preferred) if preferred and not tried else None
+            if replica is not None and not replicas.is_healthy(replica.url):
+                replica = None
+            replica = replica or replicas.pick(exclude=tried) or next(
+                (r for r in replicas.replicas.values() if r.url not in tried and replicas.is_healthy(r.url)), None
+            )
+            if replica is None:
+                return None, retry_after
+            try:
+                get_circuit_breaker(replica.url).before_call()
+                return replica, 0.0
+            except CircuitOpenError as e:
+                tried.add(replica.url)
+                retry_after = e.retry_after if retry_after is None else min(retry_after, e.retry_after)
         
     async def send_message(self, agent_name: str, message: str, context_id: Optional[str] = None) -> str:
         """
@@ -82,108 +353,98 @@ class RemoteAgentConnections:
         if not self._initialized:
             await self.initialize()
             
-        if agent_name not in self.agent_urls:
+        if agent_name not in self.replica_sets:
+            # It may have come online since the last attempt (addresses still backing off are skipped)
+            now = time.monotonic()
+            pending = [url for url, state in self._address_state.items() if state.agent_name is None and state.next_attempt <= now]
+            if pending:
+                await self.discover(pending)
+        if agent_name not in self.replica_sets:
             available = ", ".join(self.agent_cards.keys())
             error_msg = f"Agente '{agent_name}' não encontrado. Disponíveis: {available}"
             logger.error(error_msg)
             return f"{{\"error\": \"{error_msg}\"}}"
             
-        url = self.agent_urls[agent_name]
+        # Generate IDs if not provided
+        if not context_id:
+            context_id = f"ctx-{uuid.uuid4()}"
+        message_id = f"msg-{uuid.uuid4()}"
+        task_id = f"task-{uuid.uuid4()}"
         
-        try:
-            logger.info(f"📤 Sending message to {agent_name}: {message[:100]}...")
+        replicas = self.replica_sets[agent_name]
+        # Fail fast when every replica is unhealthy or has its circuit open;
+        # a known context goes back to the replica holding its remote session
+        replica, retry_after = self._choose_replica(replicas, preferred=self._context_replicas.get(context_id))
+        if replica is None and retry_after is None:
+            logger.warning(f"💔 Skipping {agent_name}: all {len(replicas)} replica(s) failing health checks")
+            return f"{{\"error\": \"Agente {agent_name} indisponível no momento (health check falhando)\"}}"
+        if replica is None:
+            logger.warning(f"🔴 Skipping {agent_name}: circuit open on all {len(replicas)} replica(s)")
+            return f"{{\"error\": \"Agente {agent_name} indisponível no momento (circuito aberto), tente novamente em {retry_after:.0f}s\"}}"
+        url = replica.url
+        breaker = get_circuit_breaker(url)
+        self._context_replicas.set(context_id, url)
+        
+        with replicas.track(replica):
+            try:
+                logger.info(f"📤 Sending message to {agent_name} ({url}): {message[:100]}...")
             
-            # Ensure httpx client exists
-            if self.httpx_client is None:
-                self.httpx_client = httpx.AsyncClient(timeout=120.0)
+                # A2A message/send payload, encoded straight to bytes from the envelope template
+                payload = message_send_payload(message, context_id, message_id, task_id=task_id)
             
-            # Generate IDs if not provided
-            import uuid
-            if not context_id:
-                context_id = f"ctx-{uuid.uuid4()}"
-            message_id = f"msg-{uuid.uuid4()}"
-            task_id = f"task-{uuid.uuid4()}"
+                # Use the pooled client for this agent's host with streaming
+                client = self.transport.client_for(url)
+                logger.debug(f"Sending A2A request to {url}")
             
-            # Construct A2A message/send payload
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "message/send",
-                "params": {
-                    "contextId": context_id,
-                    "message": {
-                        "role": "user",
-                        "parts": [{"kind": "text", "text": message}],
-                        "contextId": context_id,
-                        "messageId": message_id,
-                        "taskId": task_id
+                # Request with streaming support
+                async with client.stream(
+                    'POST',
+                    url,
+                    content=payload,
+                    headers={
+                        'Content-Type': 'application/json',
+                        'Accept': 'application/x-ndjson'
                     }
-                }
-            }
-            
-            # Use the class httpx client for HTTP requests with streaming
-            client = self.httpx_client
-            logger.debug(f"Sending A2A request to {url}")
-            
-            # Request with streaming support
-            async with client.stream(
-                'POST',
-                url,
-                json=payload,
-                headers={
-                    'Content-Type': 'application/json',
-                    'Accept': 'application/x-ndjson'
-                }
-            ) as response:
-                    if response.status_code != 200:
-                        error_text = await response.aread()
-                        logger.error(f"A2A request failed: {response.status_code} - {error_text.decode()}")
-                        return f"{{\"error\": \"Request failed with status {response.status_code}\"}}"
+                ) as response:
+                        if response.status_code != 200:
+                            error_text = await response.aread()
+                            logger.error(f"A2A request failed: {response.status_code} - {error_text.decode()}")
+                            if response.status_code >= 500:
+                                breaker.record_failure()
+                            else:
+                                breaker.record_success()
+                            return f"{{\"error\": \"Request failed with status {response.status_code}\"}}"
+                    
+                        breaker.record_success()
                     
-                    # Process streaming response
-                    final_response = None
-                    artifacts = []
+                        # Process streaming response; leaving the block early closes the stream
+                        parser = StreamParser()
+                        async with aclosing(aiter_records(response.aiter_bytes(), parser)) as events:
+                            final_response = await self._read_final_response(agent_name, events)
+                            await self._drain(agent_name, events)
                     
-                    async for line in response.aiter_lines():
-                        if not line.strip():
-                            continue
-                            
-                        try:
-                            event = json.loads(line)
-                            logger.debug(f"📥 Stream line received: {json.dumps(event, indent=2)[:200]}")
-                            
-                            # Look for artifacts in the event
-                            if 'artifact' in event:
-                                artifact = event['artifact']
-                                artifacts.append(artifact)
-                                logger.debug(f"📋 Artifact: name={artifact.get('name')}, keys={artifact.keys()}")
-                                
-                                # Extract final_response artifact
-                                if artifact.get('name') == 'final_response':
-                                    if 'parts' in artifact and artifact['parts']:
-                                        for part in artifact['parts']:
-                                            if 'text' in part:
-                                                final_response = part['text']
-                                                logger.info(f"✅ Resultado final capturado: {len(final_response)} chars")
-                                                
-                        except json.JSONDecodeError as e:
-                            logger.warning(f"⚠️  Recebida linha ou estrutura JSON inválida: {line[:100]}")
-                            continue
+                        if parser.invalid:
+                            logger.warning(f"⚠️  Recebidas {parser.invalid} linhas ou estruturas JSON inválidas")
                     
-                    # Return the final response
-                    if final_response:
-                        logger.info(f"✅ Received response from {agent_name}: {len(final_response)} characters")
-                        return final_response
-                    else:
-                        logger.warning(f"⚠️  No final_response artifact found in stream")
-                        return "Nenhum resultado textual foi retornado."
+                        # Return the final response
+                        if final_response:
+                            logger.info(f"✅ Received response from {agent_name}: {len(final_response)} characters")
+                            return final_response
+                        else:
+                            logger.warning(f"⚠️  No final_response artifact found in stream")
+                            return "Nenhum resultado textual foi retornado."
                         
-        except httpx.TimeoutException:
-            logger.error(f"⏱️  Timeout sending message to {agent_name}")
-            return f"{{\"error\": \"Timeout comunicando com {agent_name}\"}}"
-        except Exception as e:
-            logger.error(f"❌ Error sending message to {agent_name}: {e}", exc_info=True)
-            return f"{{\"error\": \"Erro: {str(e)}\"}}"
+            except httpx.TimeoutException:
+                breaker.record_failure()
+                logger.error(f"⏱️  Timeout sending message to {agent_name}")
+                return f"{{\"error\": \"Timeout comunicando com {agent_name}\"}}"
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                logger.error(f"❌ Connection error sending message to {agent_name}: {e}")
+                return f"{{\"error\": \"Erro de conexão com {agent_name}: {str(e)}\"}}"
+            except Exception as e:
+                logger.error(f"❌ Error sending message to {agent_name}: {e}", exc_info=True)
+                return f"{{\"error\": \"Erro: {str(e)}\"}}"
 
 # Global instance
 _remote_connections = None
@@ -2,8 +2,8 @@
 import os
 import logging
 import uvicorn
-import json
 import asyncio
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import google.generativeai as genai
 
@@ -13,6 +13,10 @@ from starlette.routing import Route
 from starlette.responses import StreamingResponse, JSONResponse
 from starlette.requests import Request
 
+from shared.agent_card import AGENT_CARD_PATH, CachedAgentCard
+from shared.codec import encode_event, loads
+from shared.http_transport import close_http_transport
+
 # Imports do A2A
 from a2a.types import AgentCard, AgentCapabilities, AgentSkill, SendMessageRequest
 from a2a.server.tasks import InMemoryTaskStore
@@ -43,10 +47,11 @@ PUBLIC_URL = os.environ.get("PRODUCT_SEARCH_AGENT_URL", f"http://{host}:{port}")
 # Global executor (will be initialized in main)
 executor = None
 agent_card = None
+cached_agent_card = None
 
 # --- Stream Generator ---
 async def stream_generator(event_queue):
-    """Generator que consome eventos da fila e os transforma em strings JSON para o stream."""
+    """Generator que consome eventos da fila e os transforma em linhas NDJSON (bytes) para o stream."""
     try:
         while True:
             # Use the correct API based on EventQueue implementation
@@ -54,8 +59,7 @@ async def stream_generator(event_queue):
             if event is None:
                 logger.info("📌 No more events, closing stream")
                 break
-            event_dict = event.model_dump(by_alias=True, exclude_none=True)
-            yield json.dumps(event_dict) + "\n"
+            yield encode_event(event)
             event_queue.task_done()
             # Check if this is a final event (status updates have a 'final' field at event level)
             if hasattr(event, 'final') and event.final:
@@ -68,9 +72,9 @@ async def stream_generator(event_queue):
 
 # --- Route Handlers ---
 async def get_agent_card(request: Request):
-    """Returns the agent card"""
+    """Returns the agent card, pre-serialized at startup, with ETag/Cache-Control (304 if unchanged)"""
     logger.info("📋 Agent card requested")
-    return JSONResponse(agent_card.model_dump(by_alias=True, exclude_none=True))
+    return cached_agent_card.response(request)
 
 async def handle_message(request: Request):
     """Handles message/send requests with streaming support"""
@@ -80,8 +84,10 @@ async def handle_message(request: Request):
     logger.info(f"📨 Message request received, Accept: {accept_header}")
     
     try:
-        body = await request.json()
-        logger.debug(f"📦 Request body: {json.dumps(body, indent=2)[:500]}")
+        raw_body = await request.body()
+        body = loads(raw_body)
+        # Log the raw bytes as received instead of re-serializing the parsed body
+        logger.debug(f"📦 Request body: {raw_body[:500].decode('utf-8', errors='replace')}")
         
         # Validate it's a proper A2A request
         if body.get("method") != "message/send":
@@ -135,9 +141,15 @@ async def handle_message(request: Request):
             "error": {"code": -32000, "message": str(e)}
         }, status_code=500)
 
+@asynccontextmanager
+async def lifespan(app):
+    """Closes the pooled HTTP clients when the server shuts down"""
+    yield
+    await close_http_transport()
+
 def create_app():
     """Creates the Starlette application with custom routing"""
-    global agent_card
+    global agent_card, cached_agent_card
     
     logger.info("--- Starting Product Search Agent A2A Server (FIXED) ---")
     
@@ -169,6 +181,7 @@ def create_app():
         capabilities=capabilities,
         skills=[skill],
     )
+    cached_agent_card = CachedAgentCard(agent_card)
     
     # 3. Executor
     global executor
@@ -179,9 +192,10 @@ def create_app():
     app = Starlette(
         debug=True,
         routes=[
-            Route("/.well-known/agent-card.json", get_agent_card, methods=["GET"]),
+            Route(AGENT_CARD_PATH, get_agent_card, methods=["GET"]),
             Route("/", handle_message, methods=["POST"]),
-        ]
+        ],
+        lifespan=lifespan,
     )
     
     logger.info(f"✅ Starlette app created with custom routes")
@@ -16,14 +16,14 @@ Your task is to search for products in Salesforce and verify their availability.
 When you receive a product search request, you should:
 
 1. **Extract Product Names**: Identify all product names mentioned in the request
-2. **Search Products**: Use the salesforce_search tool to search for products in Salesforce
+2. **Search Products**: Use the salesforce_verify_products tool to verify several products, or salesforce_search for a single product or a free-form search
 3. **Analyze Results**: Determine if products were found with specific details
 4. **Return Results**: Provide clear information about found products
 
 SEARCH QUERY FORMAT:
-The salesforce_search tool automatically formats queries correctly. Just provide the product names clearly.
-- Single product: "Plano Comercial Globo Impacto"
-- Multiple products: "Plano Comercial Globo Impacto, Jornal Nacional, GloboNews"
+The tools automatically format queries correctly. Just provide the product names clearly.
+- Single product: salesforce_search("Plano Comercial Globo Impacto")
+- Multiple products: salesforce_verify_products(["Plano Comercial Globo Impacto", "Jornal Nacional", "GloboNews"])
 
 STRICT VERIFICATION RULES:
 - A product is VERIFIED ONLY if the response contains:
@@ -51,9 +51,10 @@ In these cases:
 4. Recommend the user verify the exact product name or try alternative search terms
 
 SEARCH STRATEGY:
-- For multiple products, search for them together in a comma-separated format
-- Example: "Product1, Product2, Product3"
-- This is efficient and matches the expected format
+- For multiple products, call salesforce_verify_products ONCE with the list of product names
+- Each product is searched separately and in parallel, and the report already groups them
+  into VERIFIED, NOT FOUND and FAILED sections
+- Products under FAILED could not be checked (timeout or error) - say so instead of reporting them as missing
 
 RESPONSE FORMAT:
 When products are found (with concrete details), present them clearly:
@@ -74,7 +75,7 @@ Always be thorough and accurate in your product search and verification.
 
 def create_product_search_agent():
     """Create the Product Search agent with Salesforce search capability."""
-    from .tools import salesforce_search_tool
+    from .tools import salesforce_search_tool, salesforce_verify_products_tool
     
     # Try MODEL first, then ADK_MODEL for compatibility with parent .env
     model = os.getenv("MODEL") or os.getenv("ADK_MODEL", "gemini-2.5-flash")
@@ -86,7 +87,7 @@ def create_product_search_agent():
         model=model,
         description="Agent that searches and verifies products in Salesforce",
         instruction=AGENT_INSTRUCTION,
-        tools=[salesforce_search_tool],
+        tools=[salesforce_verify_products_tool, salesforce_search_tool],
     )
     
     logger.info(f"Created Product Search Agent with model: {model} (will use Vertex AI via ADK)")
@@ -1,13 +1,22 @@
 """Tools for Product Search Agent - Salesforce integration via A2A"""
 import logging
 import os
-import asyncio
-import httpx
 import uuid
 import base64
+from typing import List, Optional
 from google.adk.tools import FunctionTool
 from dotenv import load_dotenv
 
+from shared.http_transport import RemoteStatusError, get_http_transport
+from shared.rate_limit import limiter_from_env
+from shared.retry import CONTEXT_EXPIRED_MARKER, UNHEALTHY_ERROR_CLASSES, RetryPolicy
+from shared.circuit_breaker import get_circuit_breaker
+from shared.cache import cache_from_env
+from shared.batch import run_batch, split_items
+from shared.singleflight import SingleFlight
+from shared.codec import message_send_payload
+from shared.utils import normalize_query
+
 # Load .env from parent mulesoft-integration directory
 env_path = os.path.join(os.path.dirname(__file__), '..', '..', '.env')
 load_dotenv(env_path)
@@ -32,6 +41,47 @@ else:
     BASIC_AUTH_HEADER = None
     logger.warning(f"Salesforce Search Tool configured without authentication - this may cause errors!")
 
+# Concurrency cap + rate limit for the buscar_produto endpoint
+_limiter = limiter_from_env("buscar_produto", "SALESFORCE_A2A")
+
+# Backoff, jitter and retry budget for _send_message_with_retry
+_retry_policy = RetryPolicy.from_env("A2A_RETRY")
+
+# Circuit breaker so a down endpoint fails fast instead of waiting out timeouts
+_breaker = get_circuit_breaker(SALESFORCE_BUSCAR_PRODUTO_URL or "buscar_produto")
+
+# Concurrent identical searches share one upstream request
+_search_flight = SingleFlight("salesforce_search")
+
+# Per-attempt timeout of a buscar_produto request
+REQUEST_TIMEOUT = 60.0
+
+# Product data rarely changes within a day - cache answers by normalized query
+_product_cache = cache_from_env("salesforce_search", "PRODUCT_CACHE", ttl=3600, max_entries=512, persistent=True)
+
+# Products Salesforce could not resolve (answered with a confirmation question);
+# kept briefly so repeated misses return immediately
+_negative_cache = cache_from_env("salesforce_search_misses", "PRODUCT_NEGATIVE_CACHE", ttl=300, max_entries=1024)
+
+# Batch verification: products verified concurrently, each with its own timeout,
+# kept below the orchestrator's deadline so a slow product fails alone
+BATCH_MAX_CONCURRENCY = int(os.getenv("PRODUCT_BATCH_MAX_CONCURRENCY", "4"))
+BATCH_ITEM_TIMEOUT = float(os.getenv("PRODUCT_BATCH_ITEM_TIMEOUT", "75"))
+
+# Confirmation questions mean Salesforce did not find concrete product data
+CONFIRMATION_PATTERNS = [
+    "could you confirm",
+    "can you confirm",
+    "please confirm",
+    "is this the product you want",
+    "if there are additional products"
+]
+
+def _is_confirmation_request(text: str) -> bool:
+    """Check if Salesforce answered with a confirmation question instead of product data."""
+    text_lower = text.lower()
+    return any(pattern in text_lower for pattern in CONFIRMATION_PATTERNS)
+
 # Context management for persistent conversations
 _context_id = None
 _context_timestamp = None
@@ -77,35 +127,29 @@ def _clear_expired_context():
     _context_timestamp = None
     logger.info(f"🗑️  Cleared expired context for Salesforce search")
 
-async def _send_message_with_retry(query: str, max_retries: int = 5) -> str:
-    """Send message with persistent retry logic for timeouts and empty responses."""
-    for attempt in range(max_retries + 1):
+async def _send_message_with_retry(query: str, max_retries: Optional[int] = None, context_id: Optional[str] = None) -> str:
+    """
+    Send message with retry logic for timeouts and empty responses, governed by the retry policy.
+    
+    ``context_id`` gives the call its own Salesforce context (batch items);
+    when None the shared conversation context is used.
+    """
+    own_context_id = context_id
+    max_attempts = _retry_policy.max_attempts if max_retries is None else max_retries + 1
+    _retry_policy.budget.record_request()
+    
+    for attempt in range(max_attempts):
+        error = None
         try:
+            # Fail fast while the endpoint's circuit is open
+            _breaker.before_call()
+            
             # Get current context ID (may be updated during retries)
-            context_id = _get_or_create_context_id()
+            context_id = own_context_id or _get_or_create_context_id()
             message_id = str(uuid.uuid4())
             
-            # A2A JSON-RPC message/send payload
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "message/send",
-                "params": {
-                    "contextId": context_id,
-                    "message": {
-                        "role": "user",
-                        "parts": [
-                            {
-                                "kind": "text",
-                                "text": query
-                            }
-                        ],
-                        "contextId": context_id,
-                        "messageId": message_id
-                    },
-                    "metadata": {}
-                }
-            }
+            # A2A JSON-RPC message/send payload, encoded straight to bytes
+            payload = message_send_payload(query, context_id, message_id, metadata={})
             
             # Headers with Basic authentication (required by MuleSoft)
             headers = {
@@ -119,106 +163,113 @@ async def _send_message_with_retry(query: str, max_retries: int = 5) -> str:
             else:
                 logger.warning("⚠️  No authentication configured - request may fail!")
             
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                logger.debug(f"Sending request to Salesforce: {SALESFORCE_BUSCAR_PRODUTO_URL}")
-                response = await client.post(SALESFORCE_BUSCAR_PRODUTO_URL, headers=headers, json=payload)
+            # Pooled keep-alive client shared by every call to this host
+            client = get_http_transport().client_for(SALESFORCE_BUSCAR_PRODUTO_URL)
+            logger.debug(f"Sending request to Salesforce: {SALESFORCE_BUSCAR_PRODUTO_URL}")
+            async with _limiter.acquire():
+                try:
+                    response = await client.post(SALESFORCE_BUSCAR_PRODUTO_URL, headers=headers, content=payload, timeout=REQUEST_TIMEOUT)
+                except Exception as e:
+                    if _retry_policy.classify(e) in UNHEALTHY_ERROR_CLASSES:
+                        _breaker.record_failure()
+                    raise
+            
+            if response.status_code >= 500 and CONTEXT_EXPIRED_MARKER not in response.text:
+                _breaker.record_failure()
+            else:
+                _breaker.record_success()
+            
+            if response.status_code == 200:
+                result = response.json()
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    
-                    # Check for JSON-RPC error
-                    if "error" in result:
-                        logger.error(f"❌ A2A JSON-RPC error: {result['error']}")
-                        raise Exception(f"A2A error: {result['error']}")
+                # Check for JSON-RPC error
+                if "error" in result:
+                    logger.error(f"❌ A2A JSON-RPC error: {result['error']}")
+                    raise Exception(f"A2A error: {result['error']}")
+                
+                # Extract the agent's response
+                response_text = "No response received from agent"
+                if 'result' in result and 'status' in result['result'] and 'message' in result['result']['status']:
+                    agent_message = result['result']['status']['message']
+                    if 'parts' in agent_message and agent_message['parts']:
+                        response_text = agent_message['parts'][0].get('text', '')
+                
+                # Check if we got a meaningful response
+                if response_text and response_text.strip():
+                    # Check for generic/unhelpful responses and confirmation questions
+                    generic_responses = [
+                        "how can i help you",
+                        "how can i assist you", 
+                        "hi there",
+                        "hello",
+                        "what can i do for you"
+                    ]
                     
-                    # Extract the agent's response
-                    response_text = "No response received from agent"
-                    if 'result' in result and 'status' in result['result'] and 'message' in result['result']['status']:
-                        agent_message = result['result']['status']['message']
-                        if 'parts' in agent_message and agent_message['parts']:
-                            response_text = agent_message['parts'][0].get('text', '')
+                    response_lower = response_text.lower()
+                    is_generic = any(generic in response_lower for generic in generic_responses)
+                    is_confirmation = _is_confirmation_request(response_text)
                     
-                    # Check if we got a meaningful response
-                    if response_text and response_text.strip():
-                        # Check for generic/unhelpful responses and confirmation questions
-                        generic_responses = [
-                            "how can i help you",
-                            "how can i assist you", 
-                            "hi there",
-                            "hello",
-                            "what can i do for you"
-                        ]
-                        
-                        # Check for confirmation questions (agent asking for clarification)
-                        confirmation_patterns = [
-                            "could you confirm",
-                            "can you confirm",
-                            "please confirm",
-                            "is this the product you want",
-                            "if there are additional products"
-                        ]
-                        
-                        response_lower = response_text.lower()
-                        is_generic = any(generic in response_lower for generic in generic_responses)
-                        is_confirmation = any(pattern in response_lower for pattern in confirmation_patterns)
-                        
-                        # If it's a confirmation question and we're early in attempts, accept it
-                        # (the agent might need clarification from upstream)
-                        if is_confirmation and attempt == 0:
-                            logger.info(f"✅ Got confirmation request from Salesforce on attempt {attempt + 1}")
-                            return response_text
-                        
-                        # If we got a meaningful, non-generic response, return it
-                        if not is_generic or len(response_text) > 50:
-                            logger.info(f"✅ Got meaningful response from Salesforce on attempt {attempt + 1}")
-                            return response_text
-                        else:
-                            logger.warning(f"🔄 Got generic response from Salesforce, retrying (attempt {attempt + 1}/{max_retries + 1})")
+                    # If it's a confirmation question and we're early in attempts, accept it
+                    # (the agent might need clarification from upstream)
+                    if is_confirmation and attempt == 0:
+                        logger.info(f"✅ Got confirmation request from Salesforce on attempt {attempt + 1}")
+                        return response_text
                     
-                    # If empty or generic response, retry
-                    if attempt < max_retries:
-                        logger.warning(f"🔄 Empty or generic response from Salesforce, retrying (attempt {attempt + 1}/{max_retries + 1})")
-                        await asyncio.sleep(1)
-                        continue
-                    else:
-                        logger.error(f"❌ Failed to get meaningful response from Salesforce after {max_retries + 1} attempts")
-                        return "Error: No meaningful response received after multiple attempts"
-                else:
-                    error_text = response.text
-                    logger.error(f"❌ A2A message/send failed: HTTP {response.status_code}")
-                    logger.error(f"Error details: {error_text}")
-                    raise Exception(f"Failed to send message: HTTP {response.status_code}")
-                        
-        except asyncio.TimeoutError as e:
-            # Check for timeout errors
-            if attempt < max_retries:
-                logger.info(f"🔄 Timeout for Salesforce search (attempt {attempt + 1}/{max_retries + 1}), retrying...")
-                await asyncio.sleep(2)
-                continue
-            else:
-                logger.error(f"❌ Failed after {max_retries + 1} timeout attempts")
-                raise e
+                    # If we got a meaningful, non-generic response, return it
+                    if not is_generic or len(response_text) > 50:
+                        logger.info(f"✅ Got meaningful response from Salesforce on attempt {attempt + 1}")
+                        return response_text
                 
+                error_class = "empty_response"
+            else:
+                error_text = response.text
+                logger.error(f"❌ A2A message/send failed: HTTP {response.status_code}")
+                logger.error(f"Error details: {error_text}")
+                raise RemoteStatusError(f"Failed to send message: HTTP {response.status_code} - {error_text}", response.status_code)
+                    
         except Exception as e:
-            error_message = str(e).lower()
-            
-            # Check for context expiration error
-            if ("not found (404)" in error_message or "context" in error_message) and attempt < max_retries:
-                logger.info(f"🔄 Context expired for Salesforce search (attempt {attempt + 1}/{max_retries + 1}), generating new context...")
-                _clear_expired_context()
-                continue
-            
-            # For other errors, retry a few times before giving up
-            if attempt < max_retries:
-                logger.warning(f"🔄 Retry {attempt + 1}/{max_retries + 1} for Salesforce search: {e}")
-                await asyncio.sleep(1)
-                continue
+            error = e
+            error_class = _retry_policy.classify(e)
+        
+        if not _retry_policy.should_retry(error_class, attempt, max_attempts):
+            if error is not None:
+                logger.error(f"❌ Failed after {attempt + 1} attempts for Salesforce search ({error_class}): {error}")
+                raise error
+            logger.error(f"❌ Failed to get meaningful response from Salesforce after {attempt + 1} attempts")
+            return "Error: No meaningful response received after multiple attempts"
+        
+        if error_class == "context_expired":
+            logger.info(f"🔄 Context expired for Salesforce search (attempt {attempt + 1}/{max_attempts}), generating new context...")
+            if own_context_id:
+                own_context_id = _generate_context_id()
             else:
-                logger.error(f"❌ Failed after {max_retries + 1} attempts for Salesforce search: {e}")
-                raise e
+                _clear_expired_context()
+        else:
+            logger.warning(f"🔄 {error_class} from Salesforce search, retrying (attempt {attempt + 1}/{max_attempts}){f': {error}' if error else ''}")
+        
+        await _retry_policy.wait(error_class, attempt)
     
     return "Error: Failed to send message after retries"
 
+async def _search_and_cache(query: str, key: str, context_id: Optional[str] = None) -> str:
+    """Query Salesforce and cache the answer unless it is an error."""
+    response = await _send_message_with_retry(query, context_id=context_id)
+    if _is_confirmation_request(response):
+        _negative_cache.set(key, response)
+    elif not response.startswith("Error"):
+        _product_cache.set(key, response)
+    return response
+
+def invalidate_product_cache(query: Optional[str] = None) -> int:
+    """Drop the cached answer for ``query``, or every cached answer when None."""
+    if query is None:
+        count = len(_product_cache) + len(_negative_cache)
+        _product_cache.clear()
+        _negative_cache.clear()
+        return count
+    key = normalize_query(query)
+    return int(_product_cache.invalidate(key)) + int(_negative_cache.invalidate(key))
+
 async def salesforce_search(query: str) -> str:
     """
     Search for products in Salesforce via A2A protocol.
@@ -229,6 +280,10 @@ async def salesforce_search(query: str) -> str:
     Returns:
         Product search results from Salesforce
     """
+    return await _search(query)
+
+async def _search(query: str, context_id: Optional[str] = None) -> str:
+    """salesforce_search, optionally in its own Salesforce context instead of the shared one."""
     text = (query or "").strip()
     if not text:
         return "Please provide product names or specifications to search."
@@ -243,8 +298,22 @@ async def salesforce_search(query: str) -> str:
         else:
             formatted_query = text
         
+        key = normalize_query(text)
+        cached = await _product_cache.aget(key)
+        if cached is not None:
+            logger.info(f"⚡ Salesforce Search cache hit: {formatted_query[:100]}")
+            return cached
+        
+        unresolved = _negative_cache.get(key)
+        if unresolved is not None:
+            logger.info(f"⚡ Salesforce Search negative cache hit: {formatted_query[:100]}")
+            return (
+                "Salesforce could not find this product in a recent search and asked for confirmation "
+                f"(cached result, not searched again):\n\n{unresolved}"
+            )
+        
         logger.info(f"🔍 Salesforce Search: {formatted_query[:100]}{'...' if len(formatted_query) > 100 else ''}")
-        response = await _send_message_with_retry(formatted_query)
+        response = await _search_flight.do(key, lambda: _search_and_cache(formatted_query, key, context_id))
         logger.info(f"✅ Salesforce search completed")
         return response
             
@@ -252,5 +321,64 @@ async def salesforce_search(query: str) -> str:
         logger.error(f"Error in salesforce_search: {e}")
         return f"Error searching products in Salesforce: {str(e)}"
 
+async def salesforce_verify_products(products: List[str]) -> str:
+    """
+    Verify several products in Salesforce, searching each one separately and in parallel.
+    
+    Args:
+        products: Product names to verify (one name per item)
+        
+    Returns:
+        Verification report listing verified, not found and failed products
+    """
+    names = split_items(products or [])
+    if not names:
+        return "Please provide the product names to verify."
+    
+    logger.info(f"🔍 Salesforce batch verification of {len(names)} products")
+    # Each product gets its own context so concurrent items never share (or clear) one
+    results = await run_batch(
+        names,
+        lambda name: _search(name, context_id=_generate_context_id()),
+        BATCH_MAX_CONCURRENCY,
+        BATCH_ITEM_TIMEOUT,
+    )
+    
+    verified, not_found, failed = [], [], []
+    for item in results:
+        if item.status != "ok":
+            failed.append(f"### {item.item}\n{item.error}")
+        elif item.result.startswith("Error"):
+            failed.append(f"### {item.item}\n{item.result}")
+        elif _is_confirmation_request(item.result):
+            not_found.append(f"### {item.item}\n{item.result}")
+        else:
+            verified.append(f"### {item.item}\n{item.result}")
+    
+    sections = [f"Verification of {len(names)} products: {len(verified)} verified, {len(not_found)} not found, {len(failed)} failed."]
+    if verified:
+        sections.append("## VERIFIED\n\n" + "\n\n".join(verified))
+    if not_found:
+        sections.append("## NOT FOUND (Salesforce asked for confirmation)\n\n" + "\n\n".join(not_found))
+    if failed:
+        sections.append("## FAILED (could not be checked, try again)\n\n" + "\n\n".join(failed))
+    return "\n\n".join(sections)
+
+def get_limiter_stats() -> dict:
+    """Return queueing metrics of the buscar_produto limiter."""
+    return _limiter.get_stats()
+
+def get_cache_stats() -> dict:
+    """Return hit/miss counters of the product cache and of the negative cache."""
+    return {
+        "products": _product_cache.get_stats(),
+        "not_found": _negative_cache.get_stats(),
+    }
+
+def get_circuit_state() -> dict:
+    """Return the circuit breaker state of the buscar_produto endpoint."""
+    return _breaker.get_stats()
+
 # Create ADK FunctionTool instance
 salesforce_search_tool = FunctionTool(func=salesforce_search)
+salesforce_verify_products_tool = FunctionTool(func=salesforce_verify_products)
@@ -0,0 +1,138 @@
+"""Agent card serving and fetching with HTTP caching.
+
+Servers serialize their card once at startup and answer
+``/.well-known/agent-card.json`` with the same bytes, an ``ETag`` and a
+``Cache-Control: max-age``. Clients keep the last card per URL, reuse it while
+it is fresh and revalidate it with ``If-None-Match`` afterwards, so repeated
+discovery and health checks mostly cost a 304 with no body.
+"""
+import hashlib
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .codec import encode_model, loads
+from .http_transport import HttpTransport, RemoteStatusError, get_http_transport
+
+logger = logging.getLogger(__name__)
+
+AGENT_CARD_PATH = "/.well-known/agent-card.json"
+AGENT_CARD_MAX_AGE = int(os.getenv("AGENT_CARD_MAX_AGE", "300"))
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: a proxy may have prefixed our strong tag with W/
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class CachedAgentCard:
+    """An agent card serialized once, served as bytes with ``ETag`` and ``Cache-Control``."""
+
+    def __init__(self, card: Any, max_age: int = AGENT_CARD_MAX_AGE):
+        self.body = encode_model(card)
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.headers = {
+            "ETag": self.etag,
+            "Cache-Control": f"public, max-age={max_age}",
+        }
+        self.not_modified = 0
+
+    def response(self, request: Request) -> Response:
+        """Answer a card request: 304 when the client's copy is current, else the cached bytes."""
+        if _etag_matches(request.headers.get("if-none-match"), self.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=self.headers)
+        return Response(self.body, media_type="application/json", headers=self.headers)
+
+
+@dataclass
+class _CardEntry:
+    card: Dict[str, Any]
+    etag: Optional[str]
+    max_age: float
+    fetched_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() - self.fetched_at < self.max_age
+
+
+class AgentCardClient:
+    """
+    Fetches agent cards, caching them per base URL.
+
+    A card younger than its ``max-age`` is returned without a request;
+    otherwise (or with ``revalidate=True``) it is revalidated with a
+    conditional GET and a 304 keeps the cached copy.
+    """
+
+    def __init__(self, transport: Optional[HttpTransport] = None):
+        self.transport = transport or get_http_transport()
+        self._entries: Dict[str, _CardEntry] = {}
+
+        # Metrics
+        self.cache_hits = 0
+        self.not_modified = 0
+        self.downloads = 0
+
+    def cached(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the last card fetched from ``url``, fresh or not."""
+        entry = self._entries.get(url)
+        return entry.card if entry else None
+
+    async def fetch(self, url: str, timeout: Optional[float] = None, revalidate: bool = False) -> Dict[str, Any]:
+        """Return the agent card served at ``url``; raises ``RemoteStatusError`` on an unexpected status."""
+        entry = self._entries.get(url)
+        if entry and entry.fresh and not revalidate:
+            self.cache_hits += 1
+            return entry.card
+
+        headers = {"Accept": "application/json"}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        kwargs = {"headers": headers}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        response = await self.transport.client_for(url).get(f"{url}{AGENT_CARD_PATH}", **kwargs)
+
+        max_age = self._max_age(response.headers.get("cache-control"))
+        if response.status_code == 304 and entry:
+            self.not_modified += 1
+            entry.max_age = max_age
+            entry.fetched_at = time.monotonic()
+            logger.debug(f"Agent card at {url} not modified")
+            return entry.card
+        if response.status_code != 200:
+            raise RemoteStatusError(f"Could not fetch agent card from {url}: HTTP {response.status_code}", response.status_code)
+
+        self.downloads += 1
+        card = loads(response.content)
+        self._entries[url] = _CardEntry(card, response.headers.get("etag"), max_age, time.monotonic())
+        return card
+
+    @staticmethod
+    def _max_age(cache_control: Optional[str]) -> float:
+        if not cache_control or "no-store" in cache_control or "no-cache" in cache_control:
+            return 0.0
+        match = _MAX_AGE_RE.search(cache_control)
+        return float(match.group(1)) if match else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return cache counters."""
+        return {
+            "cards": len(self._entries),
+            "cache_hits": self.cache_hits,
+            "not_modified": self.not_modified,
+            "downloads": self.downloads,
+        }
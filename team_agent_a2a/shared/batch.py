@@ -0,0 +1,78 @@
+"""Batch fan-out helpers for per-item lookups.
+
+Splits a list of items (e.g. product names) and runs one lookup per item
+concurrently under a concurrency cap, with a timeout per item so a single
+slow lookup does not hold back the rest of the batch.
+"""
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+from .utils import normalize_query
+
+logger = logging.getLogger(__name__)
+
+_ITEM_SEPARATORS = re.compile(r"[,;\n]+")
+
+
+def split_items(items: Iterable[str] | str) -> List[str]:
+    """
+    Split a comma/semicolon/newline separated string (or a list of such strings)
+    into distinct items, keeping their original order.
+    """
+    if isinstance(items, str):
+        items = [items]
+    result: List[str] = []
+    seen = set()
+    for chunk in items:
+        for item in _ITEM_SEPARATORS.split(chunk or ""):
+            item = item.strip().strip("[]").strip()
+            key = normalize_query(item)
+            if key and key not in seen:
+                seen.add(key)
+                result.append(item)
+    return result
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of the lookup of one item of a batch."""
+    item: str
+    status: str  # "ok", "timeout" or "error"
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+async def run_batch(
+    items: List[str],
+    fn: Callable[[str], Awaitable[Any]],
+    max_concurrency: int = 4,
+    item_timeout: Optional[float] = 60.0,
+) -> List[BatchItemResult]:
+    """Run ``fn(item)`` for every item concurrently; results keep the order of ``items``."""
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_one(item: str) -> BatchItemResult:
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                result = await asyncio.wait_for(fn(item), timeout=item_timeout)
+                return BatchItemResult(item, "ok", result=result, elapsed=time.monotonic() - start)
+            except asyncio.TimeoutError:
+                logger.warning(f"⏱️  Batch item '{item[:80]}' timed out after {item_timeout}s")
+                return BatchItemResult(item, "timeout", error=f"timed out after {item_timeout:g}s", elapsed=time.monotonic() - start)
+            except Exception as e:
+                logger.warning(f"⚠️  Batch item '{item[:80]}' failed: {e}")
+                return BatchItemResult(item, "error", error=str(e), elapsed=time.monotonic() - start)
+
+    start = time.monotonic()
+    results = await asyncio.gather(*(run_one(item) for item in items))
+    logger.info(
+        f"📦 Batch of {len(items)} items finished in {time.monotonic() - start:.2f}s "
+        f"({sum(r.status == 'ok' for r in results)} ok)"
+    )
+    return list(results)
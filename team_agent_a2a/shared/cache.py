@@ -0,0 +1,296 @@
+"""Bounded in-memory TTL + LRU response cache.
+
+Used to keep slow upstream answers (Salesforce product lookups, datastore
+searches) for a while so repeated queries return immediately. Entries can
+optionally be served stale past their TTL while a background refresh runs,
+and written through to the optional on-disk tier in ``persistent_cache``.
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from .persistent_cache import L2_CACHE_WARM_ENTRIES, SQLiteCacheStore, get_persistent_store
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+def _size_of(value: Any) -> int:
+    """Approximate size in bytes of a cached value."""
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class TTLCache:
+    """
+    LRU cache whose entries expire ``ttl`` seconds after being stored.
+
+    The cache is bounded both by entry count and by the total size of the
+    cached values; the least recently used entries are evicted first.
+    With ``stale_ttl`` (> ``ttl``) entries are kept until that hard TTL and
+    ``get_entry`` reports them as stale once past the soft ``ttl``.
+    With an ``l2`` store, writes go through to disk in the background and
+    ``aget``/``aget_entry`` look memory misses up there, off the event loop,
+    before reporting them as misses; ``get``/``get_entry`` only see memory
+    (including what ``warm`` loaded at startup).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        max_entries: int = 1024,
+        max_bytes: int = 8 * 1024 * 1024,
+        stale_ttl: Optional[float] = None,
+        l2: Optional[SQLiteCacheStore] = None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = max(ttl, stale_ttl or 0.0)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (value, stored_at, size)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self.l2 = l2
+
+        # Metrics
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value from memory, or None when missing or expired."""
+        entry = self.get_entry(key, allow_stale=False)
+        return entry[0] if entry is not None else None
+
+    async def aget(self, key: Hashable) -> Optional[Any]:
+        """Like ``get``, falling back to the L2 store on a memory miss."""
+        entry = await self.aget_entry(key, allow_stale=False)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: Hashable, allow_stale: bool = True) -> Optional[Tuple[Any, bool]]:
+        """Return ``(value, is_stale)`` from memory, or None when missing or past the hard TTL."""
+        return self._lookup(key, self._memory_entry(key), allow_stale)
+
+    async def aget_entry(self, key: Hashable, allow_stale: bool = True) -> Optional[Tuple[Any, bool]]:
+        """Like ``get_entry``, falling back to the L2 store on a memory miss."""
+        entry = self._memory_entry(key)
+        if entry is None:
+            entry = await self._load_from_l2(key)
+        return self._lookup(key, entry, allow_stale)
+
+    def _memory_entry(self, key: Hashable) -> Optional[Tuple[Any, float, int]]:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[1] >= self.stale_ttl:
+            self._remove(key)
+            entry = None
+        return entry
+
+    def _lookup(self, key: Hashable, entry: Optional[Tuple[Any, float, int]], allow_stale: bool) -> Optional[Tuple[Any, bool]]:
+        if entry is None:
+            self.misses += 1
+            return None
+        value, stored_at, _ = entry
+        age = time.monotonic() - stored_at
+        is_stale = age >= self.ttl
+        if is_stale and not allow_stale:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        if is_stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return value, is_stale
+
+    async def _load_from_l2(self, key: Hashable) -> Optional[Tuple[Any, float, int]]:
+        """Promote a persisted entry into memory, keeping its original age."""
+        if self.l2 is None:
+            return None
+        found = await asyncio.to_thread(self.l2.get, self.name, str(key), self.stale_ttl)
+        # A newer value may have been stored while the lookup ran
+        if key in self._entries:
+            return self._memory_entry(key)
+        if found is None:
+            return None
+        value, age = found
+        self._store(key, value, age)
+        return self._entries.get(key)
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting least recently used entries to stay within bounds."""
+        self._store(key, value)
+        if self.l2 is not None:
+            self.l2.set(self.name, str(key), value)
+
+    def _store(self, key: Hashable, value: Any, age: float = 0.0):
+        size = _size_of(value)
+        if size > self.max_bytes:
+            logger.debug(f"{self.name}: value of {size} bytes exceeds cache size, not cached")
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, time.monotonic() - age, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop one entry; returns True if it was cached."""
+        if self.l2 is not None:
+            self.l2.delete(self.name, str(key))
+        if key in self._entries:
+            self._remove(key)
+            return True
+        return False
+
+    def clear(self):
+        """Drop every entry."""
+        self._entries.clear()
+        self._bytes = 0
+        if self.l2 is not None:
+            self.l2.delete(self.name)
+        logger.info(f"🗑️  Cleared cache {self.name}")
+
+    def warm(self, limit: int) -> int:
+        """Load the most frequently hit persisted entries into memory; returns how many."""
+        if self.l2 is None or limit <= 0:
+            return 0
+        self.l2.purge_expired(self.name, self.stale_ttl)
+        entries = self.l2.hot_entries(self.name, self.stale_ttl, min(limit, self.max_entries))
+        # Least hit first so the hottest entries end up most recently used
+        for key, value, age in reversed(entries):
+            self._store(key, value, age)
+        if entries:
+            logger.info(f"🔥 {self.name}: warmed {len(entries)} entries from L2 cache")
+        return len(entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters."""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "persistent": self.l2 is not None,
+        }
+
+
+class StaleWhileRevalidate:
+    """
+    Serves cached values, refreshing stale ones in the background.
+
+    Fresh entries are returned directly. Entries past the soft TTL (but before
+    the hard TTL) are returned immediately while a background task reloads
+    them. Misses wait for the loader; concurrent loads of a key are coalesced.
+    """
+
+    def __init__(self, cache: TTLCache, flight: Optional[SingleFlight] = None):
+        self.cache = cache
+        self.flight = flight or SingleFlight(cache.name)
+        self._refreshing: Set[Hashable] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.background_refreshes = 0
+
+    async def get(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """Return the value for ``key``, loading it when it is not cached."""
+        entry = await self.cache.aget_entry(key)
+        if entry is not None:
+            value, is_stale = entry
+            if is_stale:
+                self._schedule_refresh(key, loader, should_cache)
+            return value
+        return await self.flight.do(key, lambda: self._load(key, loader, should_cache))
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], should_cache: Callable[[Any], bool]) -> Any:
+        value = await loader()
+        if should_cache(value):
+            self.cache.set(key, value)
+        return value
+
+    def _schedule_refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]], should_cache: Callable[[Any], bool]):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        self.background_refreshes += 1
+
+        async def refresh():
+            try:
+                await self.flight.do(key, lambda: self._load(key, loader, should_cache))
+                logger.debug(f"🔄 {self.cache.name}: refreshed stale entry in background")
+            except Exception as e:
+                logger.warning(f"⚠️  {self.cache.name}: background refresh failed: {e}")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return cache counters plus background refresh activity."""
+        return {
+            **self.cache.get_stats(),
+            "background_refreshes": self.background_refreshes,
+            "refreshing": len(self._refreshing),
+        }
+
+
+def cache_from_env(
+    name: str,
+    prefix: str,
+    ttl: float,
+    max_entries: int = 1024,
+    max_bytes: int = 8 * 1024 * 1024,
+    stale_ttl: Optional[float] = None,
+    persistent: bool = False,
+) -> TTLCache:
+    """
+    Build a cache from ``{prefix}_TTL``, ``{prefix}_STALE_TTL``,
+    ``{prefix}_MAX_ENTRIES`` and ``{prefix}_MAX_BYTES``.
+
+    With ``persistent=True`` the cache is backed by the on-disk L2 store (when
+    ``L2_CACHE_PATH`` is set, unless ``{prefix}_PERSISTENT=false``) and warmed
+    with up to ``L2_CACHE_WARM_ENTRIES`` hot entries.
+    """
+    stale_ttl = os.getenv(f"{prefix}_STALE_TTL", str(stale_ttl) if stale_ttl is not None else None)
+    l2 = None
+    if persistent and os.getenv(f"{prefix}_PERSISTENT", "true").lower() != "false":
+        l2 = get_persistent_store()
+    cache = TTLCache(
+        name=name,
+        ttl=float(os.getenv(f"{prefix}_TTL", str(ttl))),
+        max_entries=int(os.getenv(f"{prefix}_MAX_ENTRIES", str(max_entries))),
+        max_bytes=int(os.getenv(f"{prefix}_MAX_BYTES", str(max_bytes))),
+        stale_ttl=float(stale_ttl) if stale_ttl is not None else None,
+        l2=l2,
+    )
+    cache.warm(L2_CACHE_WARM_ENTRIES)
+    return cache
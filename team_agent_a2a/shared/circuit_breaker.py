@@ -0,0 +1,139 @@
+"""Per-endpoint circuit breakers for remote A2A agents.
+
+After repeated failures the breaker opens and calls fail fast instead of
+waiting out the full timeout; after a cool-down a single trial call is let
+through (half-open) to decide whether the endpoint has recovered.
+"""
+import logging
+import os
+import time
+from enum import Enum
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the endpoint's circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable (circuit open), retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after ``failure_threshold`` consecutive failures.
+    Open -> half-open after ``recovery_timeout`` seconds.
+    Half-open -> closed on a successful trial call, back to open on failure.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._half_open_calls = 0
+        self._trial_started_at: Optional[float] = None
+
+        # Metrics
+        self.total_failures = 0
+        self.total_rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state, moving from open to half-open once the cool-down is over."""
+        if self._state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = CircuitState.HALF_OPEN
+            self._half_open_calls = 0
+            logger.info(f"🟡 Circuit half-open for {self.name}, allowing a trial call")
+        return self._state
+
+    def before_call(self):
+        """Reserve permission for a call; raises CircuitOpenError when not allowed."""
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return
+        if state == CircuitState.HALF_OPEN:
+            # A trial that never reported back (e.g. cancelled) must not block the breaker forever
+            if self._trial_started_at is not None and time.monotonic() - self._trial_started_at >= self.recovery_timeout:
+                self._half_open_calls = 0
+            if self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                self._trial_started_at = time.monotonic()
+                return
+        self.total_rejected += 1
+        retry_after = 0.0
+        if self._opened_at is not None:
+            retry_after = max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self):
+        """Record a call that reached the endpoint and got an answer."""
+        if self._state != CircuitState.CLOSED:
+            logger.info(f"🟢 Circuit closed for {self.name}")
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._half_open_calls = 0
+
+    def record_failure(self):
+        """Record a call that failed because the endpoint is unhealthy."""
+        self.total_failures += 1
+        self._consecutive_failures += 1
+        if self._state == CircuitState.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self._state != CircuitState.OPEN:
+                self.times_opened += 1
+                logger.warning(f"🔴 Circuit opened for {self.name} after {self._consecutive_failures} consecutive failures")
+            self._state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+            self._half_open_calls = 0
+
+    def get_stats(self) -> Dict[str, object]:
+        """Return the breaker state and counters for monitoring."""
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self._consecutive_failures,
+            "total_failures": self.total_failures,
+            "total_rejected": self.total_rejected,
+            "times_opened": self.times_opened,
+        }
+
+
+# Global registry, one breaker per endpoint URL
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(url: str) -> CircuitBreaker:
+    """Get or create the circuit breaker for an endpoint URL"""
+    breaker = _breakers.get(url)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            name=url,
+            failure_threshold=int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5")),
+            recovery_timeout=float(os.getenv("CIRCUIT_BREAKER_RECOVERY_TIMEOUT", "30")),
+        )
+        _breakers[url] = breaker
+    return breaker
+
+
+def get_circuit_breaker_states() -> Dict[str, Dict[str, object]]:
+    """Return the state of every circuit breaker in the process."""
+    return {url: breaker.get_stats() for url, breaker in _breakers.items()}
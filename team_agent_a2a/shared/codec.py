@@ -0,0 +1,124 @@
+"""JSON codec for A2A payloads and stream events, serializing straight to bytes.
+
+The backend is picked once at import: orjson, then msgspec, then the standard
+library, or forced with ``JSON_CODEC=orjson|msgspec|json``. Every encoder here
+returns compact UTF-8 bytes, ready to hand to httpx or a Starlette response.
+"""
+import json
+import logging
+import os
+from typing import Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional speed-up
+    msgspec = None
+
+
+# Standard-library fallback: ASCII output keeps json on its fastest (C) escaping path
+_json_encoder = json.JSONEncoder(separators=(",", ":"))
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return _json_encoder.encode(obj).encode("ascii")
+
+
+def _json_dumps_str(value: str) -> bytes:
+    return json.encoder.encode_basestring_ascii(value).encode("ascii")
+
+
+def _select_backend(requested: Optional[str]):
+    available = {"json": (_json_dumps, _json_dumps_str, json.loads)}
+    if msgspec is not None:
+        encode = msgspec.json.Encoder().encode
+        available["msgspec"] = (encode, encode, msgspec.json.Decoder().decode)
+    if orjson is not None:
+        available["orjson"] = (orjson.dumps, orjson.dumps, orjson.loads)
+    if requested:
+        if requested in available:
+            return (requested, *available[requested])
+        logger.warning(f"⚠️  JSON_CODEC={requested} is not available, falling back to the fastest installed codec")
+    for name in ("orjson", "msgspec", "json"):
+        if name in available:
+            return (name, *available[name])
+
+
+BACKEND, _dumps, _dumps_str, _loads = _select_backend(os.getenv("JSON_CODEC", "").strip().lower() or None)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode ``obj`` as compact JSON bytes."""
+    return _dumps(obj)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON from bytes or str."""
+    return _loads(data)
+
+
+def encode_event(event: Any) -> bytes:
+    """
+    Encode an A2A event (pydantic model or dict) as one NDJSON line.
+
+    Pydantic models are serialized by pydantic's own JSON encoder, which skips
+    the intermediate ``model_dump`` dict entirely.
+    """
+    dump_json = getattr(event, "model_dump_json", None)
+    if dump_json is not None:
+        return dump_json(by_alias=True, exclude_none=True).encode("utf-8") + b"\n"
+    return _dumps(event) + b"\n"
+
+
+def encode_model(model: Any) -> bytes:
+    """Encode a pydantic model (e.g. an AgentCard) as JSON bytes, by alias and without nulls."""
+    return model.model_dump_json(by_alias=True, exclude_none=True).encode("utf-8")
+
+
+# Static parts of the JSON-RPC message/send envelope; only the fields in between vary per call
+_ENVELOPE_HEAD = b'{"jsonrpc":"2.0","id":'
+_ENVELOPE_PARAMS = b',"method":"message/send","params":{"contextId":'
+_ENVELOPE_MESSAGE = b',"message":{"role":"user","parts":[{"kind":"text","text":'
+_ENVELOPE_CONTEXT = b'}],"contextId":'
+_ENVELOPE_MESSAGE_ID = b',"messageId":'
+_ENVELOPE_TASK_ID = b',"taskId":'
+_ENVELOPE_METADATA = b',"metadata":'
+
+
+def message_send_payload(
+    text: str,
+    context_id: str,
+    message_id: str,
+    task_id: Optional[str] = None,
+    metadata: Optional[dict] = None,
+    request_id: Any = 1,
+) -> bytes:
+    """
+    Build the body of an A2A ``message/send`` request with a single user text part.
+
+    Equivalent to ``dumps()`` of the usual envelope dict, but assembled from
+    pre-encoded fragments so only the variable fields are encoded per call.
+    ``metadata`` is omitted from ``params`` when None.
+    """
+    context = _dumps_str(context_id)
+    parts = [
+        _ENVELOPE_HEAD, b"1" if request_id == 1 else _dumps(request_id),
+        _ENVELOPE_PARAMS, context,
+        _ENVELOPE_MESSAGE, _dumps_str(text),
+        _ENVELOPE_CONTEXT, context,
+        _ENVELOPE_MESSAGE_ID, _dumps_str(message_id),
+    ]
+    if task_id is not None:
+        parts += [_ENVELOPE_TASK_ID, _dumps_str(task_id)]
+    parts.append(b"}")
+    if metadata is not None:
+        parts += [_ENVELOPE_METADATA, _dumps(metadata) if metadata else b"{}"]
+    parts.append(b"}}")
+    return b"".join(parts)
+
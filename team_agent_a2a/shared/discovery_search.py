@@ -0,0 +1,143 @@
+"""Direct Vertex AI Search (Discovery Engine) queries against the offers datastore.
+
+Searching the datastore directly skips the datastore LLM agent that otherwise
+sits between ``vertex_search`` and ``VertexAiSearchTool``: one network hop and
+one model round trip fewer per search. Ranked documents come back as plain dicts.
+
+Set ``DISCOVERY_ENGINE_API_ENDPOINT`` to a local gRPC stand-in (``localhost:port``)
+to run against a fake server without Google credentials, or pass a ``client``
+object exposing an async ``search(request=...)``.
+"""
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+try:
+    from google.cloud import discoveryengine_v1 as discoveryengine
+except ImportError:  # pragma: no cover - optional dependency
+    discoveryengine = None
+
+logger = logging.getLogger(__name__)
+
+VERTEX_SEARCH_DATASTORE = os.getenv(
+    "VERTEX_SEARCH_DATASTORE",
+    "projects/205867137421/locations/us/collections/default_collection/dataStores/ma014-datastore-develop-oferta_b2b",
+)
+VERTEX_SEARCH_PAGE_SIZE = int(os.getenv("VERTEX_SEARCH_PAGE_SIZE", "10"))
+DISCOVERY_ENGINE_API_ENDPOINT = os.getenv("DISCOVERY_ENGINE_API_ENDPOINT")
+
+_LOCATION_RE = re.compile(r"/locations/([^/]+)/")
+_LOCAL_ENDPOINT_RE = re.compile(r"^(localhost|127\.0\.0\.1|\[::1\])(:\d+)?$")
+
+
+def _default_endpoint(datastore: str) -> Optional[str]:
+    """Regional datastores (e.g. ``locations/us``) must be queried on their regional endpoint."""
+    match = _LOCATION_RE.search(datastore)
+    if match and match.group(1) != "global":
+        return f"{match.group(1)}-discoveryengine.googleapis.com"
+    return None
+
+
+class DiscoverySearch:
+    """
+    Runs ranked searches on one Discovery Engine datastore.
+
+    The gRPC client is created lazily on first use so it binds to the event
+    loop that actually runs the searches.
+    """
+
+    def __init__(
+        self,
+        datastore: str = VERTEX_SEARCH_DATASTORE,
+        serving_config: str = "default_config",
+        page_size: int = VERTEX_SEARCH_PAGE_SIZE,
+        api_endpoint: Optional[str] = DISCOVERY_ENGINE_API_ENDPOINT,
+        client: Any = None,
+    ):
+        self.datastore = datastore
+        self.serving_config = f"{datastore}/servingConfigs/{serving_config}"
+        self.page_size = page_size
+        self.api_endpoint = api_endpoint or _default_endpoint(datastore)
+        self._client = client
+
+    def _create_client(self):
+        if discoveryengine is None:
+            raise RuntimeError("google-cloud-discoveryengine is not installed; direct search is unavailable")
+        if self.api_endpoint and _LOCAL_ENDPOINT_RE.match(self.api_endpoint):
+            # Local stand-in server: plain gRPC channel, no Google credentials
+            import grpc
+            from google.cloud.discoveryengine_v1.services.search_service.transports import (
+                SearchServiceGrpcAsyncIOTransport,
+            )
+            logger.info(f"🧪 Discovery Engine search using local endpoint {self.api_endpoint}")
+            transport = SearchServiceGrpcAsyncIOTransport(channel=grpc.aio.insecure_channel(self.api_endpoint))
+            return discoveryengine.SearchServiceAsyncClient(transport=transport)
+        client_options = {"api_endpoint": self.api_endpoint} if self.api_endpoint else None
+        return discoveryengine.SearchServiceAsyncClient(client_options=client_options)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    async def search(self, query: str, page_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the top ranked documents for ``query``, best match first."""
+        size = page_size or self.page_size
+        request = {"serving_config": self.serving_config, "query": query, "page_size": size}
+        if discoveryengine is not None:
+            request = discoveryengine.SearchRequest(**request)
+        response = await self.client.search(request=request)
+
+        documents = []
+        # Only the first page: iterating the pager would fetch further pages lazily
+        for result in list(getattr(response, "results", []))[:size]:
+            document = result.document
+            if discoveryengine is not None and isinstance(document, discoveryengine.Document):
+                document = discoveryengine.Document.to_dict(document)
+            documents.append(document)
+        logger.info(f"🔎 Discovery Engine returned {len(documents)} documents")
+        return documents
+
+
+def _document_fields(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge the structured and derived (unstructured) data of a document."""
+    fields: Dict[str, Any] = {}
+    fields.update(document.get("derived_struct_data") or {})
+    fields.update(document.get("struct_data") or {})
+    return fields
+
+
+def format_documents(documents: List[Dict[str, Any]]) -> str:
+    """Render ranked documents as a numbered, readable product list."""
+    lines = []
+    for rank, document in enumerate(documents, start=1):
+        fields = _document_fields(document)
+        title = fields.pop("title", None) or document.get("id", f"Document {rank}")
+        link = fields.pop("link", None)
+        snippets = fields.pop("snippets", None) or []
+        fields.pop("extractive_answers", None)
+        lines.append(f"{rank}. **{title}**")
+        for name, value in fields.items():
+            if value not in (None, "", [], {}):
+                lines.append(f"   - {name}: {value}")
+        for snippet in snippets:
+            text = snippet.get("snippet") if isinstance(snippet, dict) else None
+            if text:
+                lines.append(f"   > {text}")
+        if link:
+            lines.append(f"   Fonte: {link}")
+    return "\n".join(lines)
+
+
+# Global search instance
+_search: Optional[DiscoverySearch] = None
+
+
+def get_discovery_search() -> DiscoverySearch:
+    """Get or create the global DiscoverySearch instance"""
+    global _search
+    if _search is None:
+        _search = DiscoverySearch()
+    return _search
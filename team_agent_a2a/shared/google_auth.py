@@ -0,0 +1,155 @@
+"""Process-wide cached Google Cloud credentials with proactive token refresh.
+
+``google.auth.default()`` and ``credentials.refresh()`` are blocking round
+trips to the metadata server / OAuth endpoint. The provider loads the
+credentials once, caches the access token and refreshes it in the background
+``refresh_margin`` seconds before it expires, so callers almost never wait.
+"""
+import asyncio
+import datetime
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+import google.auth
+import google.auth.transport.requests
+
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_TOKEN_REFRESH_MARGIN = float(os.getenv("GOOGLE_TOKEN_REFRESH_MARGIN", "300"))
+_DEFAULT_TOKEN_LIFETIME = 3600.0
+_RETRY_AFTER_FAILURE = 30.0
+
+
+class CredentialProvider:
+    """
+    Caches an access token and keeps it fresh.
+
+    ``get_token()`` returns the cached token while it is valid for more than
+    ``refresh_margin`` seconds. After each refresh a background task is
+    scheduled to refresh again before expiry; concurrent callers that do need
+    a refresh share a single one.
+    """
+
+    def __init__(self, refresh_margin: float = GOOGLE_TOKEN_REFRESH_MARGIN):
+        self.refresh_margin = refresh_margin
+        self._credentials = None
+        self._token: Optional[str] = None
+        self._expires_at: Optional[float] = None  # monotonic
+        self._refreshed_at: Optional[float] = None  # monotonic
+        self._refresh_at: Optional[float] = None  # monotonic, when the token is due for refresh
+        self._flight = SingleFlight("google_token")
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.last_refresh_latency = 0.0
+        self.total_refresh_latency = 0.0
+
+    def _seconds_left(self) -> float:
+        if self._token is None or self._expires_at is None:
+            return 0.0
+        return self._expires_at - time.monotonic()
+
+    def _refresh_sync(self):
+        """Blocking refresh; runs in a worker thread."""
+        if self._credentials is None:
+            self._credentials, _ = google.auth.default()
+        self._credentials.refresh(google.auth.transport.requests.Request())
+        expiry = getattr(self._credentials, "expiry", None)
+        if expiry is not None:
+            # google-auth reports expiry as a naive UTC datetime
+            now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+            lifetime = (expiry - now).total_seconds()
+        else:
+            lifetime = _DEFAULT_TOKEN_LIFETIME
+        return self._credentials.token, lifetime
+
+    async def _refresh(self) -> Optional[str]:
+        start = time.monotonic()
+        try:
+            token, lifetime = await asyncio.to_thread(self._refresh_sync)
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.error(f"Failed to get Google Cloud token: {e}")
+            self._schedule_refresh(_RETRY_AFTER_FAILURE)
+            # Keep serving the previous token while it has not actually expired
+            if self._seconds_left() > 0:
+                self._refresh_at = time.monotonic() + _RETRY_AFTER_FAILURE
+                return self._token
+            return None
+        latency = time.monotonic() - start
+        self.refreshes += 1
+        self.last_refresh_latency = latency
+        self.total_refresh_latency += latency
+        self._token = token
+        self._refreshed_at = time.monotonic()
+        self._expires_at = self._refreshed_at + lifetime
+        # Short-lived tokens are refreshed halfway through instead of right away
+        delay = max(lifetime / 2, lifetime - self.refresh_margin)
+        self._refresh_at = self._refreshed_at + delay
+        logger.info(f"🔑 Google Cloud token refreshed in {latency:.2f}s (valid for {lifetime:.0f}s)")
+        self._schedule_refresh(delay)
+        return token
+
+    def _schedule_refresh(self, delay: float):
+        """Refresh again after ``delay`` seconds, replacing any pending refresh."""
+        current = asyncio.current_task()
+        pending = self._refresh_task
+        if pending is not None and not pending.done() and pending is not current:
+            # The pending refresh may belong to another thread's loop, or to one already closed
+            loop = pending.get_loop()
+            if loop is asyncio.get_running_loop():
+                pending.cancel()
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(pending.cancel)
+
+        async def refresh_later():
+            await asyncio.sleep(delay)
+            await self._flight.do("token", self._refresh)
+
+        self._refresh_task = asyncio.get_running_loop().create_task(refresh_later())
+
+    async def get_token(self) -> Optional[str]:
+        """Return a valid access token, refreshing only when the cached one is about to expire."""
+        if self._token is not None and time.monotonic() < self._refresh_at:
+            # Re-arm the proactive refresh if its task died with a previous event loop
+            task = self._refresh_task
+            if task is None or task.done() or task.get_loop().is_closed():
+                self._schedule_refresh(self._refresh_at - time.monotonic())
+            return self._token
+        return await self._flight.do("token", self._refresh)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return token age, time to expiry and refresh latency."""
+        now = time.monotonic()
+        return {
+            "has_token": self._token is not None,
+            "token_age_seconds": round(now - self._refreshed_at, 1) if self._refreshed_at else None,
+            "expires_in_seconds": round(self._seconds_left(), 1) if self._token else None,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "last_refresh_latency": round(self.last_refresh_latency, 3),
+            "avg_refresh_latency": round(self.total_refresh_latency / self.refreshes, 3) if self.refreshes else 0.0,
+        }
+
+
+# Global provider instance
+_provider: Optional[CredentialProvider] = None
+
+
+def get_credential_provider() -> CredentialProvider:
+    """Get or create the global CredentialProvider instance"""
+    global _provider
+    if _provider is None:
+        _provider = CredentialProvider()
+    return _provider
+
+
+async def get_google_token() -> Optional[str]:
+    """Return a cached Google Cloud access token (None when authentication fails)."""
+    return await get_credential_provider().get_token()
@@ -0,0 +1,148 @@
+"""Active health checking of remote endpoints.
+
+A background loop probes every tracked endpoint at a fixed interval and keeps
+a rolling window of outcomes and latencies per endpoint. An endpoint turns
+unhealthy after ``unhealthy_after`` consecutive failed probes and healthy
+again after ``healthy_after`` consecutive successes; endpoints not probed yet
+count as healthy so a fresh process can route right away.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_INTERVAL = float(os.getenv("REMOTE_AGENT_HEALTH_INTERVAL", "10"))
+HEALTH_CHECK_TIMEOUT = float(os.getenv("REMOTE_AGENT_HEALTH_TIMEOUT", "2"))
+
+
+class EndpointHealth:
+    """Rolling probe outcomes and latencies of one endpoint."""
+
+    def __init__(self, window: int):
+        self.samples: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.consecutive_successes = 0
+        self.last_error: Optional[str] = None
+        self.last_probe_at: Optional[float] = None
+
+    @property
+    def success_rate(self) -> float:
+        if not self.samples:
+            return 1.0
+        return sum(ok for ok, _ in self.samples) / len(self.samples)
+
+    def latency(self, quantile: float) -> Optional[float]:
+        """Latency quantile of the successful probes in the window."""
+        latencies = sorted(latency for ok, latency in self.samples if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(quantile * len(latencies)))]
+
+    def get_stats(self) -> Dict[str, Any]:
+        p50, p95 = self.latency(0.5), self.latency(0.95)
+        return {
+            "healthy": self.healthy,
+            "success_rate": round(self.success_rate, 3),
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "probes": len(self.samples),
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_probe_ago": round(time.monotonic() - self.last_probe_at, 1) if self.last_probe_at else None,
+        }
+
+
+class HealthChecker:
+    """
+    Probes tracked endpoints with ``probe(url)`` every ``interval`` seconds.
+
+    The probe is any coroutine that raises when the endpoint is unhealthy; it
+    is bounded by ``timeout``. All endpoints are probed concurrently.
+    """
+
+    def __init__(
+        self,
+        probe: Callable[[str], Awaitable[Any]],
+        interval: float = HEALTH_CHECK_INTERVAL,
+        timeout: float = HEALTH_CHECK_TIMEOUT,
+        window: int = int(os.getenv("REMOTE_AGENT_HEALTH_WINDOW", "20")),
+        unhealthy_after: int = int(os.getenv("REMOTE_AGENT_UNHEALTHY_AFTER", "2")),
+        healthy_after: int = int(os.getenv("REMOTE_AGENT_HEALTHY_AFTER", "2")),
+    ):
+        self.probe = probe
+        self.interval = interval
+        self.timeout = timeout
+        self.window = window
+        self.unhealthy_after = unhealthy_after
+        self.healthy_after = healthy_after
+        self._endpoints: Dict[str, EndpointHealth] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def track(self, url: str):
+        if url not in self._endpoints:
+            self._endpoints[url] = EndpointHealth(self.window)
+
+    def untrack(self, url: str):
+        self._endpoints.pop(url, None)
+
+    def is_healthy(self, url: str) -> bool:
+        endpoint = self._endpoints.get(url)
+        return endpoint is None or endpoint.healthy
+
+    def record(self, url: str, ok: bool, latency: float, error: Optional[str] = None):
+        """Record one probe outcome and update the endpoint's health."""
+        endpoint = self._endpoints.get(url)
+        if endpoint is None:
+            return
+        endpoint.samples.append((ok, latency))
+        endpoint.last_probe_at = time.monotonic()
+        if ok:
+            endpoint.consecutive_failures = 0
+            endpoint.consecutive_successes += 1
+            if not endpoint.healthy and endpoint.consecutive_successes >= self.healthy_after:
+                endpoint.healthy = True
+                logger.info(f"💚 {url} is healthy again")
+        else:
+            endpoint.last_error = error
+            endpoint.consecutive_successes = 0
+            endpoint.consecutive_failures += 1
+            if endpoint.healthy and endpoint.consecutive_failures >= self.unhealthy_after:
+                endpoint.healthy = False
+                logger.warning(f"💔 {url} marked unhealthy after {endpoint.consecutive_failures} failed probes: {error}")
+
+    async def check(self, url: str):
+        """Probe one endpoint now."""
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self.probe(url), self.timeout)
+        except Exception as e:
+            self.record(url, False, time.monotonic() - start, str(e) or type(e).__name__)
+        else:
+            self.record(url, True, time.monotonic() - start)
+
+    async def check_all(self):
+        """Probe every tracked endpoint concurrently."""
+        if self._endpoints:
+            await asyncio.gather(*(self.check(url) for url in list(self._endpoints)))
+
+    def start(self):
+        """Start the probe loop on the running event loop (no-op if already running)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check_all()
+            except Exception as e:
+                logger.error(f"❌ Health check round failed: {e}", exc_info=True)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the health and rolling probe metrics of every endpoint."""
+        return {url: endpoint.get_stats() for url, endpoint in self._endpoints.items()}
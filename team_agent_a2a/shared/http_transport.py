@@ -0,0 +1,161 @@
+"""Process-wide pooled HTTP transport for every outbound A2A and MuleSoft call.
+
+All clients (A2A servers, orchestrator, teams_agent and SalesforceAgentManager)
+share one transport so connections are kept alive and re-used across calls
+instead of paying a TCP+TLS handshake per request.
+
+Async pools belong to the event loop that opened their connections, so they
+are kept per running loop: AdkApp serves each request with ``asyncio.run`` on
+a fresh loop, and a client reused from a closed loop would fail.
+"""
+import asyncio
+import logging
+import os
+import ssl
+import threading
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import certifi
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_DEFAULT_TIMEOUT", "120"))
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+MAX_KEEPALIVE_PER_HOST = int(os.getenv("HTTP_MAX_KEEPALIVE_PER_HOST", "10"))
+KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+
+
+class RemoteStatusError(Exception):
+    """Raised when a remote endpoint answers with an unexpected HTTP status."""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _origin(url: str) -> str:
+    """Return scheme://host:port used as the pool key for a URL."""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    return f"{parts.scheme}://{parts.hostname}:{port}"
+
+
+class HttpTransport:
+    """
+    Keeps one keep-alive connection pool per remote origin (and, for async
+    clients, per event loop).
+
+    Each origin gets its own httpx client so connection limits apply per host,
+    and all clients share a single SSL context so certificates are loaded once
+    and TLS state is re-used across pools.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+        max_keepalive_per_host: int = MAX_KEEPALIVE_PER_HOST,
+        keepalive_expiry: float = KEEPALIVE_EXPIRY,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections_per_host,
+            max_keepalive_connections=max_keepalive_per_host,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout)
+        self.ssl_context = ssl.create_default_context(cafile=certifi.where())
+        # event loop -> origin -> client; entries go away with their loop
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+        self._sync_clients: Dict[str, httpx.Client] = {}
+        self._lock = threading.Lock()
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Get the pooled async client for the origin of ``url`` on the running event loop."""
+        loop = asyncio.get_running_loop()
+        origin = _origin(url)
+        clients = self._async_clients.get(loop)
+        client = clients.get(origin) if clients is not None else None
+        if client is None or client.is_closed:
+            with self._lock:
+                clients = self._async_clients.get(loop)
+                if clients is None:
+                    # Forget pools of loops that have been closed since
+                    for stale in [other for other in self._async_clients if other.is_closed()]:
+                        del self._async_clients[stale]
+                    clients = self._async_clients[loop] = {}
+                client = clients.get(origin)
+                if client is None or client.is_closed:
+                    client = httpx.AsyncClient(
+                        limits=self.limits,
+                        timeout=self.timeout,
+                        verify=self.ssl_context,
+                    )
+                    clients[origin] = client
+                    logger.info(f"🔌 Created pooled async HTTP client for {origin}")
+        return client
+
+    def sync_client_for(self, url: str) -> httpx.Client:
+        """Get the pooled blocking client for the origin of ``url``."""
+        origin = _origin(url)
+        client = self._sync_clients.get(origin)
+        if client is None or client.is_closed:
+            with self._lock:
+                client = self._sync_clients.get(origin)
+                if client is None or client.is_closed:
+                    client = httpx.Client(
+                        limits=self.limits,
+                        timeout=self.timeout,
+                        verify=self.ssl_context,
+                    )
+                    self._sync_clients[origin] = client
+                    logger.info(f"🔌 Created pooled sync HTTP client for {origin}")
+        return client
+
+    def get_stats(self) -> Dict[str, list]:
+        """Return the origins that currently hold a connection pool."""
+        loops = [clients for loop, clients in list(self._async_clients.items()) if not loop.is_closed()]
+        return {
+            "async_pools": sorted({origin for clients in loops for origin in clients}),
+            "event_loops": len(loops),
+            "sync_pools": list(self._sync_clients.keys()),
+        }
+
+    async def aclose(self):
+        """Close every pooled client; async pools of other event loops are only dropped."""
+        clients = self._async_clients.pop(asyncio.get_running_loop(), {})
+        for origin, client in list(clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing HTTP client for {origin}: {e}")
+        for origin, client in list(self._sync_clients.items()):
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning(f"Error closing HTTP client for {origin}: {e}")
+        self._async_clients.clear()
+        self._sync_clients.clear()
+        logger.info("Closed pooled HTTP clients")
+
+
+# Global transport instance
+_transport: Optional[HttpTransport] = None
+
+
+def get_http_transport() -> HttpTransport:
+    """Get or create the global HttpTransport instance"""
+    global _transport
+    if _transport is None:
+        _transport = HttpTransport()
+    return _transport
+
+
+async def close_http_transport():
+    """Close the global HttpTransport instance"""
+    global _transport
+    if _transport is not None:
+        await _transport.aclose()
+        _transport = None
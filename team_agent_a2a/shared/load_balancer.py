@@ -0,0 +1,113 @@
+"""Client-side load balancing across replicas of one remote agent.
+
+Replicas are picked by least outstanding requests, either over all of them
+(``least_outstanding``) or over two chosen at random (``p2c``, power of two
+choices, the default: nearly as good and does not herd every caller onto the
+same replica). Passive ejection uses the per-URL circuit breakers: a replica
+whose circuit is open is skipped until its cool-down ends. Replicas an active
+health checker reports unhealthy are skipped as well.
+"""
+import logging
+import os
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .circuit_breaker import CircuitState, get_circuit_breaker
+
+logger = logging.getLogger(__name__)
+
+LB_STRATEGY = os.getenv("REMOTE_AGENT_LB_STRATEGY", "p2c")
+
+
+@dataclass
+class Replica:
+    """One replica (base URL) of a remote agent and its in-flight requests."""
+    url: str
+    outstanding: int = 0
+    requests: int = 0
+
+    @property
+    def ejected(self) -> bool:
+        return get_circuit_breaker(self.url).state == CircuitState.OPEN
+
+
+class ReplicaSet:
+    """
+    The replicas serving one agent name.
+
+    ``pick()`` returns a replica to send to; wrap the request in
+    ``track(replica)`` so the outstanding count reflects in-flight calls.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        strategy: str = LB_STRATEGY,
+        is_healthy: Optional[Callable[[str], bool]] = None,
+    ):
+        if strategy not in ("p2c", "least_outstanding"):
+            logger.warning(f"⚠️  Unknown load balancing strategy '{strategy}', using p2c")
+            strategy = "p2c"
+        self.name = name
+        self.strategy = strategy
+        self.is_healthy = is_healthy or (lambda url: True)
+        self.replicas: Dict[str, Replica] = {}
+
+    def __len__(self) -> int:
+        return len(self.replicas)
+
+    @property
+    def urls(self) -> List[str]:
+        return list(self.replicas)
+
+    def add(self, url: str):
+        if url not in self.replicas:
+            self.replicas[url] = Replica(url)
+            if len(self.replicas) > 1:
+                logger.info(f"⚖️  {self.name} now has {len(self.replicas)} replicas")
+
+    def discard(self, url: str):
+        self.replicas.pop(url, None)
+
+    def healthy_urls(self) -> List[str]:
+        return [url for url in self.replicas if self.is_healthy(url)]
+
+    def pick(self, exclude: Iterable[str] = ()) -> Optional[Replica]:
+        """Choose a replica, skipping ejected, unhealthy and ``exclude``d ones; None when none is left."""
+        excluded = set(exclude)
+        candidates = [
+            r for r in self.replicas.values()
+            if r.url not in excluded and not r.ejected and self.is_healthy(r.url)
+        ]
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        if self.strategy == "p2c":
+            candidates = random.sample(candidates, 2)
+        least = min(r.outstanding for r in candidates)
+        return random.choice([r for r in candidates if r.outstanding == least])
+
+    @contextmanager
+    def track(self, replica: Replica):
+        """Count a request as outstanding on ``replica`` for the duration of the block."""
+        replica.outstanding += 1
+        replica.requests += 1
+        try:
+            yield replica
+        finally:
+            replica.outstanding -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return per-replica load and ejection state."""
+        return {
+            url: {
+                "outstanding": replica.outstanding,
+                "requests": replica.requests,
+                "ejected": replica.ejected,
+                "healthy": self.is_healthy(url),
+            }
+            for url, replica in self.replicas.items()
+        }
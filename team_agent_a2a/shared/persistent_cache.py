@@ -0,0 +1,286 @@
+"""Optional on-disk (L2) tier for the response caches, backed by SQLite in WAL mode.
+
+Entries written to an in-memory ``TTLCache`` are also written here, so a
+restarted server can answer repeated queries without going back to Vertex or
+MuleSoft. On startup the most frequently hit entries are loaded back into
+memory. The tier is disabled unless ``L2_CACHE_PATH`` is set.
+
+Nothing here blocks the event loop for long: writes, deletes and hit-count
+updates are queued to a background writer thread, and ``TTLCache`` runs
+lookups in a worker thread.
+"""
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+L2_CACHE_PATH = os.getenv("L2_CACHE_PATH")
+L2_CACHE_MAX_BYTES = int(os.getenv("L2_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+L2_CACHE_WARM_ENTRIES = int(os.getenv("L2_CACHE_WARM_ENTRIES", "128"))
+L2_CACHE_WRITE_QUEUE = int(os.getenv("L2_CACHE_WRITE_QUEUE", "1024"))
+
+# Queued operations the writer applies in one transaction
+_WRITE_BATCH = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace   TEXT    NOT NULL,
+    key         TEXT    NOT NULL,
+    value       TEXT    NOT NULL,
+    size        INTEGER NOT NULL,
+    stored_at   REAL    NOT NULL,
+    last_access REAL    NOT NULL,
+    hits        INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_last_access ON cache_entries (last_access);
+"""
+
+
+class SQLiteCacheStore:
+    """
+    Shared SQLite file holding the persisted entries of every cache in the process.
+
+    Each cache uses its own namespace. Timestamps are wall-clock so ages survive
+    restarts; the total size is bounded by ``max_bytes``, evicting the least
+    recently accessed entries first. ``get`` reads synchronously (call it from
+    a worker thread); ``set``, ``delete`` and the hit counting of ``get`` only
+    enqueue work for the writer thread, in order. When more than
+    ``write_queue`` operations are pending, new sets and hit updates are
+    dropped rather than queued; deletes never are.
+    """
+
+    def __init__(self, path: str, max_bytes: int = L2_CACHE_MAX_BYTES, write_queue: int = L2_CACHE_WRITE_QUEUE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.write_queue = write_queue
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0
+        self.dropped_writes = 0
+
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="l2-cache-writer", daemon=True)
+        self._writer.start()
+        logger.info(f"💾 L2 cache opened at {path} ({self._bytes} bytes persisted)")
+
+    def get(self, namespace: str, key: str, max_age: float) -> Optional[Tuple[Any, float]]:
+        """Return ``(value, age_seconds)`` for an entry younger than ``max_age``, else None. Blocking."""
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, stored_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (namespace, key),
+                ).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"⚠️  L2 cache read failed for {namespace}: {e}")
+            return None
+        if row is None or now - row[1] >= max_age:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._enqueue(("touch", namespace, key, now), droppable=True)
+        return json.loads(row[0]), now - row[1]
+
+    def set(self, namespace: str, key: str, value: Any):
+        """Queue an entry to be persisted."""
+        self._enqueue(("set", namespace, key, value, time.time()), droppable=True)
+
+    def delete(self, namespace: str, key: Optional[str] = None):
+        """Queue dropping one entry, or every entry of the namespace when ``key`` is None."""
+        self._enqueue(("delete", namespace, key))
+
+    def flush(self):
+        """Block until every queued operation has been applied."""
+        self._queue.join()
+
+    def _enqueue(self, operation: tuple, droppable: bool = False):
+        if droppable and self._queue.qsize() >= self.write_queue:
+            self.dropped_writes += 1
+            return
+        self._queue.put(operation)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while batch[-1] is not None and len(batch) < _WRITE_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            operations = [operation for operation in batch if operation is not None]
+            try:
+                if operations:
+                    self._apply(operations)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️  L2 cache write failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if batch[-1] is None:
+                return
+
+    def _apply(self, operations: List[tuple]):
+        # One transaction per batch of queued operations
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for operation in operations:
+                    kind, namespace, key = operation[:3]
+                    if kind == "set":
+                        self._write(namespace, key, *operation[3:])
+                    elif kind == "touch":
+                        self._conn.execute(
+                            "UPDATE cache_entries SET last_access = ?, hits = hits + 1 WHERE namespace = ? AND key = ?",
+                            (operation[3], namespace, key),
+                        )
+                    elif key is None:
+                        self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+                        self._bytes = self._total_bytes()
+                    else:
+                        self._conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+                        self._bytes = self._total_bytes()
+                if self._bytes > self.max_bytes:
+                    self._evict()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                self._bytes = self._total_bytes()
+                raise
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+
+    def _write(self, namespace: str, key: str, value: Any, now: float):
+        # Writer thread, inside _apply's transaction
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            logger.debug(f"{namespace}: value is not JSON serializable, not persisted")
+            return
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        previous = self._conn.execute(
+            "SELECT size FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        # Re-writing a key (refresh) keeps and bumps its hit count, so hot keys stay hot
+        self._conn.execute(
+            "INSERT INTO cache_entries (namespace, key, value, size, stored_at, last_access, hits) "
+            "VALUES (?, ?, ?, ?, ?, ?, 0) "
+            "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+            "stored_at = excluded.stored_at, last_access = excluded.last_access, hits = hits + 1",
+            (namespace, key, payload, size, now, now),
+        )
+        self._bytes += size - (previous[0] if previous else 0)
+        self.writes += 1
+
+    def _evict(self):
+        # Writer thread, inside _apply's transaction. Walk the last_access index only
+        # as far as needed, then delete those rows in one statement.
+        cursor = self._conn.execute("SELECT size FROM cache_entries ORDER BY last_access")
+        count, freed = 0, 0
+        for (size,) in cursor:
+            if self._bytes - freed <= self.max_bytes:
+                break
+            count += 1
+            freed += size
+        cursor.close()
+        self._conn.execute(
+            "DELETE FROM cache_entries WHERE rowid IN "
+            "(SELECT rowid FROM cache_entries ORDER BY last_access LIMIT ?)",
+            (count,),
+        )
+        self._bytes -= freed
+        self.evictions += count
+
+    def purge_expired(self, namespace: str, max_age: float) -> int:
+        """Delete entries of ``namespace`` older than ``max_age``; returns how many were removed. Blocking (warm-up only)."""
+        try:
+            with self._lock:
+                cursor = self._conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND stored_at <= ?",
+                    (namespace, time.time() - max_age),
+                )
+                self._bytes = self._total_bytes()
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"⚠️  L2 cache purge failed for {namespace}: {e}")
+            return 0
+
+    def hot_entries(self, namespace: str, max_age: float, limit: int) -> List[Tuple[str, Any, float]]:
+        """Return up to ``limit`` live ``(key, value, age_seconds)`` entries, most hit first. Blocking (warm-up only)."""
+        now = time.time()
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key, value, stored_at FROM cache_entries WHERE namespace = ? AND stored_at > ? "
+                    "ORDER BY hits DESC, last_access DESC LIMIT ?",
+                    (namespace, now - max_age, limit),
+                ).fetchall()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"⚠️  L2 cache warm-load failed for {namespace}: {e}")
+            return []
+        return [(key, json.loads(value), now - stored_at) for key, value, stored_at in rows]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "pending_writes": self._queue.qsize(),
+            "dropped_writes": self.dropped_writes,
+            "errors": self.errors,
+        }
+
+    def close(self):
+        """Apply the queued operations, stop the writer and close the database connection."""
+        self._queue.put(None)
+        self._writer.join()
+        with self._lock:
+            self._conn.close()
+
+
+# Global store instance (None when the L2 tier is disabled)
+_store: Optional[SQLiteCacheStore] = None
+
+
+def get_persistent_store() -> Optional[SQLiteCacheStore]:
+    """Get or create the global SQLiteCacheStore, or None when ``L2_CACHE_PATH`` is not set"""
+    global _store
+    if _store is None and L2_CACHE_PATH:
+        try:
+            _store = SQLiteCacheStore(L2_CACHE_PATH)
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"❌ Could not open L2 cache at {L2_CACHE_PATH}, continuing without it: {e}")
+            return None
+    return _store
@@ -0,0 +1,209 @@
+"""Per-endpoint token-bucket rate limiting and concurrency bulkheads.
+
+Each remote endpoint gets its own limiter so a slow endpoint only queues its
+own callers instead of starving every other endpoint in the process.
+
+The limiters are process-wide and shared by every event loop (AdkApp runs
+each request on a new loop in its own thread), so their state sits behind
+thread locks instead of loop-bound asyncio primitives.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BulkheadFullError(Exception):
+    """Raised when a caller waits too long for a slot on a saturated endpoint."""
+
+
+class TokenBucket:
+    """
+    Async token bucket: ``rate`` tokens per second with a ``burst`` capacity.
+
+    A caller reserves its token up front (the balance may go negative) and
+    then sleeps until the token has accrued, so callers are served in order
+    without holding a lock while they wait.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._refill()
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class _Slots:
+    """
+    Counting semaphore usable from any thread's event loop.
+
+    A released slot is handed straight to the oldest waiter, woken on its own
+    loop; a waiter that was cancelled in the meantime passes it on.
+    """
+
+    def __init__(self, value: int):
+        self._value = value
+        self._lock = threading.Lock()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                if (loop, waiter) in self._waiters:
+                    # Still queued: no slot was handed over
+                    self._waiters.remove((loop, waiter))
+                    raise
+            if waiter.done() and not waiter.cancelled():
+                # The slot arrived just before the cancellation: give it back
+                self.release()
+            # Otherwise it is on its way; _hand_over sees the cancelled waiter and passes it on
+            raise
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._hand_over, waiter)
+                    return
+                except RuntimeError:
+                    # The waiter's loop is closed; try the next one
+                    continue
+            self._value += 1
+
+    def _hand_over(self, waiter: asyncio.Future):
+        if waiter.done():
+            self.release()
+        else:
+            waiter.set_result(None)
+
+
+class EndpointLimiter:
+    """
+    Concurrency cap plus token-bucket rate limit for one endpoint.
+
+    Use as ``async with limiter.acquire(): ...`` around each outbound request.
+    Queueing metrics are kept so saturation is visible in ``get_stats()``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 4,
+        rate_per_sec: float = 5.0,
+        burst: int = 10,
+        max_queue_wait: Optional[float] = 30.0,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue_wait = max_queue_wait
+        self._slots = _Slots(max_concurrency)
+        self._bucket = TokenBucket(rate_per_sec, burst)
+
+        # Metrics
+        self.in_flight = 0
+        self.queued = 0
+        self.total_requests = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Take a concurrency slot and a rate token, waiting in queue if needed."""
+        start = time.monotonic()
+        self.queued += 1
+        try:
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.max_queue_wait)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                logger.warning(f"🚧 {self.name}: no slot after {self.max_queue_wait}s ({self.in_flight} in flight)")
+                raise BulkheadFullError(f"Endpoint {self.name} is saturated, try again later")
+            try:
+                await self._bucket.acquire()
+            except BaseException:
+                self._slots.release()
+                raise
+        finally:
+            self.queued -= 1
+
+        waited = time.monotonic() - start
+        self.total_requests += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        if waited > 1.0:
+            logger.info(f"⏳ {self.name}: waited {waited:.2f}s for a request slot")
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return queueing metrics for this endpoint."""
+        avg_wait = self.total_wait_seconds / self.total_requests if self.total_requests else 0.0
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "total_requests": self.total_requests,
+            "rejected": self.rejected,
+            "avg_wait_seconds": round(avg_wait, 3),
+            "max_wait_seconds": round(self.max_wait_seconds, 3),
+        }
+
+
+def limiter_from_env(name: str, prefix: str) -> EndpointLimiter:
+    """
+    Build a limiter for ``name`` from environment variables.
+
+    ``{prefix}_{NAME}_MAX_CONCURRENCY`` overrides ``{prefix}_MAX_CONCURRENCY``
+    (same for ``RATE_PER_SEC``, ``BURST`` and ``MAX_QUEUE_WAIT``).
+    """
+    def setting(key: str, default: str) -> str:
+        specific = os.getenv(f"{prefix}_{name.upper()}_{key}")
+        return specific if specific is not None else os.getenv(f"{prefix}_{key}", default)
+
+    max_queue_wait = float(setting("MAX_QUEUE_WAIT", "30"))
+    return EndpointLimiter(
+        name=name,
+        max_concurrency=int(setting("MAX_CONCURRENCY", "4")),
+        rate_per_sec=float(setting("RATE_PER_SEC", "5")),
+        burst=int(setting("BURST", "10")),
+        max_queue_wait=max_queue_wait if max_queue_wait > 0 else None,
+    )
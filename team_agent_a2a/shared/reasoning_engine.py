@@ -0,0 +1,130 @@
+"""Async client for Vertex AI reasoning engines (Agent Engine) ``:query`` / ``:streamQuery``.
+
+Requests go through the pooled transport, so no call blocks the event loop and
+a cancelled caller (e.g. a timed-out tool call) closes its stream immediately.
+"""
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from .google_auth import get_google_token
+from .http_transport import get_http_transport
+from .stream_parser import aiter_records, event_texts
+
+logger = logging.getLogger(__name__)
+
+
+class ReasoningEngineError(Exception):
+    """Raised when the reasoning engine cannot be reached or authenticated."""
+
+
+class ReasoningEngineClient:
+    """
+    Calls the class methods of one deployed reasoning engine.
+
+    ``token_provider`` is an async callable returning a bearer token; by
+    default the process-wide cached credentials are used.
+    """
+
+    def __init__(
+        self,
+        engine_id: str,
+        project: str,
+        location: str,
+        token_provider: Optional[Callable[[], Awaitable[Optional[str]]]] = None,
+        query_timeout: float = 30.0,
+        stream_timeout: float = 60.0,
+    ):
+        self.engine_id = engine_id
+        self.project = project
+        self.location = location
+        self.token_provider = token_provider or get_google_token
+        self.query_timeout = query_timeout
+        self.stream_timeout = stream_timeout
+        self.base_url = (
+            f"https://{location}-aiplatform.googleapis.com/v1/projects/{project}"
+            f"/locations/{location}/reasoningEngines/{engine_id}"
+        )
+
+    async def _headers(self) -> Dict[str, str]:
+        token = await self.token_provider()
+        if not token:
+            raise ReasoningEngineError("Could not authenticate with Google Cloud")
+        return {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        }
+
+    async def query(self, class_method: str, input: Dict[str, Any]) -> Dict[str, Any]:
+        """Call ``:query`` and return the decoded JSON body."""
+        url = f"{self.base_url}:query"
+        client = get_http_transport().client_for(url)
+        response = await client.post(
+            url,
+            headers=await self._headers(),
+            json={"class_method": class_method, "input": input},
+            timeout=self.query_timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def create_session(self, user_id: str) -> str:
+        """Create a session for ``user_id`` and return its id."""
+        data = await self.query("create_session", {"user_id": user_id})
+        session_id = data["output"]["id"]
+        logger.debug(f"Session created on reasoning engine {self.engine_id}: {session_id}")
+        return session_id
+
+    async def stream_query(self, user_id: str, session_id: str, message: str) -> AsyncIterator[Dict[str, Any]]:
+        """Call ``:streamQuery`` and yield each decoded event as it arrives."""
+        url = f"{self.base_url}:streamQuery?alt=sse"
+        client = get_http_transport().client_for(url)
+        payload = {
+            "class_method": "stream_query",
+            "input": {
+                "user_id": user_id,
+                "session_id": session_id,
+                "message": message,
+            },
+        }
+        async with client.stream(
+            "POST", url, headers=await self._headers(), json=payload, timeout=self.stream_timeout
+        ) as response:
+            response.raise_for_status()
+            # SSE "data:" frames and bare JSON lines are both accepted
+            async for event in aiter_records(response.aiter_bytes()):
+                yield event
+
+    async def stream_query_chunks(self, user_id: str, session_id: str, message: str) -> AsyncIterator[str]:
+        """Run ``stream_query`` and yield the text parts of each event as they arrive."""
+        async for event in self.stream_query(user_id, session_id, message):
+            for text in event_texts(event):
+                yield text
+
+    async def stream_query_text(
+        self,
+        user_id: str,
+        session_id: str,
+        message: str,
+        on_chunk: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> str:
+        """Run ``stream_query`` and return the concatenated text, passing each chunk to ``on_chunk``."""
+        chunks = []
+        async for chunk in self.stream_query_chunks(user_id, session_id, message):
+            chunks.append(chunk)
+            if on_chunk is not None:
+                await on_chunk(chunk)
+        return "".join(chunks)
+
+
+# Global registry, one client per reasoning engine
+_clients: Dict[Tuple[str, str, str], ReasoningEngineClient] = {}
+
+
+def get_reasoning_engine_client(engine_id: str, project: str, location: str) -> ReasoningEngineClient:
+    """Get or create the client for a reasoning engine"""
+    key = (engine_id, project, location)
+    client = _clients.get(key)
+    if client is None:
+        client = ReasoningEngineClient(engine_id, project, location)
+        _clients[key] = client
+    return client
@@ -0,0 +1,193 @@
+"""Retry policy with exponential backoff, full jitter and a process-wide retry budget.
+
+The budget caps retries to a fraction of recent requests so that, during an
+upstream brownout, our own clients do not multiply the load on the endpoint.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import httpx
+
+from .circuit_breaker import CircuitOpenError
+from .rate_limit import BulkheadFullError
+
+logger = logging.getLogger(__name__)
+
+
+class RetryBudget:
+    """
+    Allows retries up to ``ratio`` of the requests seen in the last ``window`` seconds.
+
+    ``min_retries`` retries are always allowed per window so that low traffic
+    still gets a chance to recover from isolated failures.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_retries: int = 10, window: float = 10.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests: deque = deque()
+        self._retries: deque = deque()
+        self.exhausted = 0
+
+    def _trim(self, now: float):
+        cutoff = now - self.window
+        while self._requests and self._requests[0] < cutoff:
+            self._requests.popleft()
+        while self._retries and self._retries[0] < cutoff:
+            self._retries.popleft()
+
+    def record_request(self):
+        """Record an original (non-retry) request."""
+        now = time.monotonic()
+        self._trim(now)
+        self._requests.append(now)
+
+    def try_acquire(self) -> bool:
+        """Take one retry from the budget; False when the budget is spent."""
+        now = time.monotonic()
+        self._trim(now)
+        allowed = max(self.min_retries, int(len(self._requests) * self.ratio))
+        if len(self._retries) >= allowed:
+            self.exhausted += 1
+            return False
+        self._retries.append(now)
+        return True
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return budget usage over the current window."""
+        self._trim(time.monotonic())
+        return {
+            "requests_in_window": len(self._requests),
+            "retries_in_window": len(self._retries),
+            "ratio": self.ratio,
+            "exhausted": self.exhausted,
+        }
+
+
+@dataclass
+class RetryRule:
+    """How a class of error is retried."""
+    retry: bool = True
+    backoff: bool = True  # False retries immediately
+
+
+DEFAULT_RULES: Dict[str, RetryRule] = {
+    "timeout": RetryRule(),
+    "connection": RetryRule(),
+    "server_error": RetryRule(),
+    "rate_limited": RetryRule(),
+    "empty_response": RetryRule(),
+    # Jittered too, so a burst of callers sharing a dropped context does not re-hit the endpoint at once
+    "context_expired": RetryRule(),
+    "client_error": RetryRule(retry=False),
+    "saturated": RetryRule(retry=False),
+    "circuit_open": RetryRule(retry=False),
+    "other": RetryRule(),
+}
+
+# Salesforce reports an expired context as an HTTP 500 whose error says "not found (404)"
+CONTEXT_EXPIRED_MARKER = "not found (404)"
+
+# Error classes that mean the endpoint itself is unhealthy (these trip circuit breakers)
+UNHEALTHY_ERROR_CLASSES = frozenset({"timeout", "connection", "server_error"})
+
+
+class RetryPolicy:
+    """
+    Decides whether and when to retry a failed attempt.
+
+    Delays follow exponential backoff with full jitter:
+    ``uniform(0, min(max_delay, base_delay * 2 ** attempt))``.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 6,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        rules: Optional[Dict[str, RetryRule]] = None,
+        budget: Optional[RetryBudget] = None,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rules = {**DEFAULT_RULES, **(rules or {})}
+        self.budget = budget or get_retry_budget()
+
+    @classmethod
+    def from_env(cls, prefix: str = "A2A_RETRY", **kwargs) -> "RetryPolicy":
+        """Build a policy from ``{prefix}_MAX_ATTEMPTS``, ``_BASE_DELAY`` and ``_MAX_DELAY``."""
+        return cls(
+            max_attempts=int(os.getenv(f"{prefix}_MAX_ATTEMPTS", "6")),
+            base_delay=float(os.getenv(f"{prefix}_BASE_DELAY", "0.5")),
+            max_delay=float(os.getenv(f"{prefix}_MAX_DELAY", "8")),
+            **kwargs,
+        )
+
+    @staticmethod
+    def classify(error: BaseException) -> str:
+        """Map an exception to one of the error classes in ``DEFAULT_RULES``."""
+        message = str(error).lower()
+        if isinstance(error, BulkheadFullError):
+            return "saturated"
+        if isinstance(error, CircuitOpenError):
+            return "circuit_open"
+        if isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException)) or "timeout" in message:
+            return "timeout"
+        status_code = getattr(error, "status_code", None)
+        if status_code == 429:
+            return "rate_limited"
+        # Only the exact marker on a 500 (or a JSON-RPC error without a status) is an expired context
+        if CONTEXT_EXPIRED_MARKER in message and status_code in (None, 500):
+            return "context_expired"
+        if isinstance(error, httpx.TransportError):
+            return "connection"
+        if status_code is not None and status_code >= 500:
+            return "server_error"
+        if status_code is not None and status_code >= 400:
+            return "client_error"
+        return "other"
+
+    def should_retry(self, error_class: str, attempt: int, max_attempts: Optional[int] = None) -> bool:
+        """Whether attempt number ``attempt`` (0-based) may be followed by another one."""
+        max_attempts = max_attempts or self.max_attempts
+        if attempt + 1 >= max_attempts:
+            return False
+        if not self.rules.get(error_class, self.rules["other"]).retry:
+            return False
+        if not self.budget.try_acquire():
+            logger.warning(f"🪫 Retry budget exhausted, not retrying {error_class}")
+            return False
+        return True
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter delay before the retry that follows attempt ``attempt``."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def wait(self, error_class: str, attempt: int):
+        """Sleep before retrying, unless the error class retries immediately."""
+        if self.rules.get(error_class, self.rules["other"]).backoff:
+            await asyncio.sleep(self.backoff_delay(attempt))
+
+
+# Global retry budget shared by every policy in the process
+_retry_budget: Optional[RetryBudget] = None
+
+
+def get_retry_budget() -> RetryBudget:
+    """Get or create the process-wide RetryBudget"""
+    global _retry_budget
+    if _retry_budget is None:
+        _retry_budget = RetryBudget(
+            ratio=float(os.getenv("A2A_RETRY_BUDGET_RATIO", "0.1")),
+            min_retries=int(os.getenv("A2A_RETRY_BUDGET_MIN_RETRIES", "10")),
+            window=float(os.getenv("A2A_RETRY_BUDGET_WINDOW", "10")),
+        )
+    return _retry_budget
@@ -0,0 +1,210 @@
+"""Pool of pre-created reasoning-engine sessions.
+
+Creating a session is a full round trip before every datastore search. The
+pool keeps a few sessions ready, refilled in the background, and recycles each
+one after ``max_uses`` queries or ``ttl`` seconds so its history stays small.
+Sessions are plain ids, so one pool serves every event loop (AdkApp runs each
+request on its own); its bookkeeping is guarded by a thread lock.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Set
+
+from .reasoning_engine import ReasoningEngineClient
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledSession:
+    """A reasoning-engine session and its usage so far."""
+    session_id: str
+    created_at: float = field(default_factory=time.monotonic)
+    uses: int = 0
+
+
+class SessionPool:
+    """
+    Keeps ``size`` sessions of one reasoning engine, idle or in use.
+
+    Each session is used by one query at a time. ``acquire()`` takes an idle
+    session (or creates one when none is idle) and ``release()`` returns it,
+    unless it reached ``max_uses`` or ``ttl`` or its query failed, in which
+    case it is deleted on the engine and replaced in the background. Sessions
+    in use count toward ``size``, so the pool is only refilled when a session
+    is recycled or could not be created; sessions created on demand beyond
+    ``size`` are deleted when released.
+    """
+
+    def __init__(
+        self,
+        engine: ReasoningEngineClient,
+        user_id: str,
+        size: int = 4,
+        ttl: float = 1800.0,
+        max_uses: int = 5,
+    ):
+        self.engine = engine
+        self.user_id = user_id
+        self.size = size
+        self.ttl = ttl
+        self.max_uses = max_uses
+        self._idle: Deque[PooledSession] = deque()
+        self._in_use = 0
+        self._creating = 0
+        self._lock = threading.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Metrics
+        self.created = 0
+        self.created_on_demand = 0
+        self.reused = 0
+        self.recycled = 0
+        self.create_failures = 0
+
+    def _expired(self, session: PooledSession) -> bool:
+        return session.uses >= self.max_uses or time.monotonic() - session.created_at >= self.ttl
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _create(self) -> PooledSession:
+        session_id = await self.engine.create_session(self.user_id)
+        self.created += 1
+        return PooledSession(session_id)
+
+    def _refill(self):
+        """Create sessions in the background until ``size`` are idle, in use or being created."""
+        with self._lock:
+            missing = max(0, self.size - len(self._idle) - self._in_use - self._creating)
+            self._creating += missing
+        for _ in range(missing):
+            self._spawn(self._create_idle())
+
+    def warm(self) -> int:
+        """
+        Start filling the pool in the background; returns how many sessions are being created.
+
+        Call it from the startup path (needs a running event loop) so the first
+        queries find sessions ready instead of creating them on demand.
+        """
+        asyncio.get_running_loop()  # raises RuntimeError before any bookkeeping when there is none
+        creating = self._creating
+        self._refill()
+        started = self._creating - creating
+        if started:
+            logger.info(f"🔥 Pre-creating {started} sessions on reasoning engine {self.engine.engine_id}")
+        return started
+
+    async def _create_idle(self):
+        session = None
+        try:
+            session = await self._create()
+        except Exception as e:
+            self.create_failures += 1
+            logger.warning(f"⚠️  Could not pre-create session on reasoning engine {self.engine.engine_id}: {e}")
+        finally:
+            with self._lock:
+                self._creating -= 1
+                if session is not None:
+                    self._idle.append(session)
+
+    async def _delete(self, session: PooledSession):
+        try:
+            await self.engine.query("delete_session", {"user_id": self.user_id, "session_id": session.session_id})
+        except Exception as e:
+            logger.debug(f"Could not delete recycled session {session.session_id}: {e}")
+
+    def _recycle(self, session: PooledSession):
+        self.recycled += 1
+        self._spawn(self._delete(session))
+
+    async def acquire(self) -> PooledSession:
+        """Take an idle session, creating one right away when none is ready."""
+        recycled = False
+        while True:
+            with self._lock:
+                session = self._idle.popleft() if self._idle else None
+                if session is not None and not self._expired(session):
+                    self._in_use += 1
+                    break
+            if session is None:
+                break
+            self._recycle(session)
+            recycled = True
+        if session is not None:
+            if session.uses:
+                self.reused += 1
+            if recycled:
+                self._refill()
+            return session
+        with self._lock:
+            self._in_use += 1
+        # Nothing idle: create this one now and any other missing ones in the background
+        self._refill()
+        self.created_on_demand += 1
+        try:
+            return await self._create()
+        except BaseException:
+            with self._lock:
+                self._in_use -= 1
+            raise
+
+    def release(self, session: PooledSession, healthy: bool = True):
+        """Return a session after a query; unhealthy, worn-out or surplus sessions are recycled."""
+        session.uses += 1
+        with self._lock:
+            self._in_use -= 1
+            keep = (
+                healthy
+                and not self._expired(session)
+                and len(self._idle) + self._in_use + self._creating < self.size
+            )
+            if keep:
+                self._idle.append(session)
+        if not keep:
+            self._recycle(session)
+            self._refill()
+
+    @asynccontextmanager
+    async def session(self):
+        """``async with pool.session() as session_id: ...`` - recycles the session if the block fails."""
+        session = await self.acquire()
+        try:
+            yield session.session_id
+        except BaseException:
+            self.release(session, healthy=False)
+            raise
+        self.release(session)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return pool occupancy and session counters."""
+        return {
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "creating": self._creating,
+            "created": self.created,
+            "created_on_demand": self.created_on_demand,
+            "reused": self.reused,
+            "recycled": self.recycled,
+            "create_failures": self.create_failures,
+        }
+
+
+def session_pool_from_env(engine: ReasoningEngineClient, user_id: str, prefix: str) -> SessionPool:
+    """Build a pool from ``{prefix}_POOL_SIZE``, ``{prefix}_TTL`` and ``{prefix}_MAX_USES``."""
+    return SessionPool(
+        engine,
+        user_id,
+        size=int(os.getenv(f"{prefix}_POOL_SIZE", "4")),
+        ttl=float(os.getenv(f"{prefix}_TTL", "1800")),
+        max_uses=int(os.getenv(f"{prefix}_MAX_USES", "5")),
+    )
@@ -0,0 +1,64 @@
+"""Singleflight coalescing of identical in-flight requests.
+
+Concurrent callers asking for the same key share a single upstream call and
+its result instead of each sending their own request. Calls are only shared
+within an event loop: a task cannot be awaited from another loop, and AdkApp
+runs each request on its own.
+"""
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers await the same result."""
+
+    def __init__(self, name: str):
+        self.name = name
+        # event loop -> key -> task; entries go away with their loop
+        self._inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return ``await fn()``, sharing the call with any in-flight caller for ``key``."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            inflight = self._inflight.get(loop)
+            if inflight is None:
+                inflight = self._inflight[loop] = {}
+        task = inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.info(f"🔗 {self.name}: joined in-flight request for '{key[:80]}'")
+        else:
+            # The call runs as its own task so no single caller, the first one
+            # included, can cancel it for the others by going away
+            task = loop.create_task(fn())
+            inflight[key] = task
+            self.calls += 1
+            task.add_done_callback(lambda done: self._finished(inflight, key, done))
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _finished(inflight: Dict[str, asyncio.Task], key: str, task: asyncio.Task):
+        if inflight.get(key) is task:
+            del inflight[key]
+        # Mark retrieved so a failure nobody awaited any more does not log a warning
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return how many calls were made and how many were coalesced."""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": sum(len(inflight) for inflight in list(self._inflight.values())),
+        }
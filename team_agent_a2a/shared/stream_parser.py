@@ -0,0 +1,127 @@
+"""Incremental parser for SSE and NDJSON response streams.
+
+Used for every streamed response we consume: reasoning-engine ``streamQuery``
+(SSE, ``data:`` frames) and A2A ``message/send`` streams (NDJSON). Input can be
+fed in arbitrary chunks - records split across chunk boundaries are
+reassembled - and JSON is decoded with orjson when it is installed.
+"""
+import json
+import logging
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Union
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _DECODE_ERRORS = (orjson.JSONDecodeError, UnicodeDecodeError)
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+    _loads = json.loads
+    _DECODE_ERRORS = (json.JSONDecodeError, UnicodeDecodeError)
+
+logger = logging.getLogger(__name__)
+
+_SSE_DONE = b"[DONE]"
+
+
+class StreamParser:
+    """
+    Turns a byte stream into decoded JSON records.
+
+    Each line is either an NDJSON record, or an SSE field: ``data:`` lines are
+    collected and decoded as one record when the event ends (blank line),
+    while comments and the ``event:``/``id:``/``retry:`` fields are skipped.
+    Undecodable records are counted in ``invalid`` and dropped.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._data: List[bytes] = []
+        self.records = 0
+        self.invalid = 0
+
+    def feed(self, chunk: Union[bytes, str]) -> List[Any]:
+        """Add a chunk of the stream and return the records it completed."""
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        self._buffer += chunk
+        end = self._buffer.rfind(b"\n")
+        if end < 0:
+            return []
+        complete = bytes(self._buffer[:end])
+        del self._buffer[: end + 1]
+        records: List[Any] = []
+        for line in complete.split(b"\n"):
+            self._line(line, records)
+        return records
+
+    def close(self) -> List[Any]:
+        """Flush a trailing line without newline and any pending SSE event."""
+        records: List[Any] = []
+        if self._buffer:
+            line = bytes(self._buffer)
+            self._buffer.clear()
+            self._line(line, records)
+        self._dispatch(records)
+        return records
+
+    def _line(self, line: bytes, records: List[Any]):
+        line = line.rstrip(b"\r")
+        if not line.strip():
+            self._dispatch(records)
+        elif line.startswith(b"data:"):
+            value = line[5:]
+            self._data.append(value[1:] if value.startswith(b" ") else value)
+        elif line.startswith((b":", b"event:", b"id:", b"retry:")):
+            return
+        else:
+            self._dispatch(records)
+            self._decode(line, records)
+
+    def _dispatch(self, records: List[Any]):
+        """End of an SSE event: decode its accumulated ``data:`` lines."""
+        if not self._data:
+            return
+        payload = b"\n".join(self._data)
+        self._data.clear()
+        if payload.strip() != _SSE_DONE:
+            self._decode(payload, records)
+
+    def _decode(self, payload: bytes, records: List[Any]):
+        try:
+            records.append(_loads(payload))
+            self.records += 1
+        except _DECODE_ERRORS:
+            self.invalid += 1
+            logger.debug(f"Skipping undecodable stream record: {payload[:100]!r}")
+
+
+async def aiter_records(
+    chunks: AsyncIterable[Union[bytes, str]], parser: Optional[StreamParser] = None
+) -> AsyncIterator[Any]:
+    """Yield decoded records from an async byte stream (e.g. ``response.aiter_bytes()``)."""
+    parser = parser or StreamParser()
+    async for chunk in chunks:
+        for record in parser.feed(chunk):
+            yield record
+    for record in parser.close():
+        yield record
+
+
+def iter_records(chunks: Iterable[Union[bytes, str]], parser: Optional[StreamParser] = None) -> Iterator[Any]:
+    """Yield decoded records from a blocking byte stream (e.g. ``response.iter_content()``)."""
+    parser = parser or StreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def event_texts(event: Dict[str, Any]) -> Iterator[str]:
+    """Yield the text parts of an ADK event (``content.parts[].text``, or top-level ``parts``)."""
+    if not isinstance(event, dict):
+        return
+    content = event.get("content")
+    parts = content.get("parts") if isinstance(content, dict) else event.get("parts")
+    for part in parts or []:
+        if isinstance(part, dict) and part.get("text"):
+            yield part["text"]
@@ -0,0 +1,88 @@
+"""Relay of partial tool output to the A2A client while a tool is still running.
+
+The A2A executor installs a ``PartialTextRelay`` for the duration of a run;
+tools deep inside the ADK runner call ``emit_partial(chunk)`` as text arrives
+and the relay forwards it, batched, as incremental artifact updates. Outside
+an executor (no relay installed) ``emit_partial`` is a no-op. Chunks can
+carry a ``source`` (e.g. the remote agent they came from); chunks of
+different sources are never batched together.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_current_relay: ContextVar[Optional["PartialTextRelay"]] = ContextVar("partial_text_relay", default=None)
+
+
+class PartialTextRelay:
+    """
+    Buffers partial text and forwards it through ``send(text, first, source)``.
+
+    Chunks are batched until ``min_chars`` characters or ``min_interval``
+    seconds have accumulated, so a token-by-token stream does not turn into
+    one artifact event per token. A chunk from another source than the
+    buffered ones flushes the buffer first, so every ``send`` covers a single
+    source.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, bool, Optional[str]], Awaitable[None]],
+        min_chars: int = 200,
+        min_interval: float = 0.5,
+    ):
+        self.send = send
+        self.min_chars = min_chars
+        self.min_interval = min_interval
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._source: Optional[str] = None
+        self._last_sent = time.monotonic()
+        self.chunks_sent = 0
+
+    async def push(self, text: str, source: Optional[str] = None):
+        """Add a chunk, forwarding the buffer once it is large or old enough."""
+        if not text:
+            return
+        if self._buffer and source != self._source:
+            await self.flush()
+        self._source = source
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.min_chars or time.monotonic() - self._last_sent >= self.min_interval:
+            await self.flush()
+
+    async def flush(self):
+        """Forward whatever is buffered."""
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        self._last_sent = time.monotonic()
+        try:
+            await self.send(text, self.chunks_sent == 0, self._source)
+            self.chunks_sent += 1
+        except Exception as e:
+            logger.warning(f"⚠️  Could not relay partial output: {e}")
+
+
+@contextmanager
+def partial_output(relay: PartialTextRelay):
+    """Install ``relay`` as the destination of ``emit_partial`` within the block."""
+    token = _current_relay.set(relay)
+    try:
+        yield relay
+    finally:
+        _current_relay.reset(token)
+
+
+async def emit_partial(text: str, source: Optional[str] = None):
+    """Forward a chunk of partial tool output, from ``source`` if given, to the current relay, if any."""
+    relay = _current_relay.get()
+    if relay is not None:
+        await relay.push(text, source)
@@ -1,5 +1,6 @@
 """Shared utility functions"""
 import re
+import unicodedata
 
 # Accepts formatted (99.999.999/9999-99) and unformatted (99999999999999) CNPJ, with optional separators
 _CNPJ_FLEX_RE = re.compile(
@@ -16,3 +17,13 @@ def extract_cnpj(text: str | None) -> str | None:
     g1, g2, g3, g4, g5 = m.groups()
     return f"{g1}.{g2}.{g3}/{g4}-{g5}"
 
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_query(text: str | None) -> str:
+    """Canonical form of a search query, used as coalescing and cache key."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    return text.rstrip(" .;!?")
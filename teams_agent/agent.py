@@ -16,6 +16,7 @@ from typing import Optional
 
 from . import prompt
 from .sub_agents.contextualized_offer.agent import contextualized_offer_agent
+from .tools.data_ai_tool import warm_up_sessions
 
 
 # Configure ADK logging
@@ -89,6 +90,7 @@ coordinator_agent = Agent(
     instruction=prompt.COORDINATOR_PROMPT,
     sub_agents=SUB_AGENTS,
     # tools=[load_memory],  # Add memory search capability
+    before_agent_callback=warm_up_sessions,
 )
 
 # Expose as entry point
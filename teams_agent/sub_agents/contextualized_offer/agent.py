@@ -2,7 +2,7 @@
 
 import os
 from google.adk.agents import Agent
-from ...tools.salesforce_tools import buscar_produto_tool
+from ...tools.salesforce_tools import buscar_produto_tool, verificar_produtos_tool
 from ...tools.data_ai_tool import data_and_ai_tool
 from ... import prompt
 
@@ -25,7 +25,7 @@ product_verifier_agent = Agent(
     name="ProductVerifierAgent", 
     description="Verifies products from Data & AI using Salesforce buscar_produto and asks for user confirmation",
     instruction=prompt.PRODUCT_VERIFIER_PROMPT,
-    tools=[buscar_produto_tool],
+    tools=[verificar_produtos_tool, buscar_produto_tool],
 )
 
 # Offer Generator Agent - Creates the final contextualized offer
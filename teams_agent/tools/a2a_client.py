@@ -8,10 +8,20 @@ import logging
 import os
 import uuid
 from typing import Optional, Dict, Any, List
-import aiohttp
 import base64
+import httpx
 from dotenv import load_dotenv
 
+from team_agent_a2a.shared.http_transport import RemoteStatusError, get_http_transport
+from team_agent_a2a.shared.rate_limit import limiter_from_env
+from team_agent_a2a.shared.retry import UNHEALTHY_ERROR_CLASSES, RetryPolicy
+from team_agent_a2a.shared.circuit_breaker import get_circuit_breaker
+from team_agent_a2a.shared.cache import StaleWhileRevalidate, cache_from_env
+from team_agent_a2a.shared.batch import run_batch, split_items
+from team_agent_a2a.shared.singleflight import SingleFlight
+from team_agent_a2a.shared.utils import extract_cnpj, normalize_query
+from team_agent_a2a.shared.codec import message_send_payload
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -35,13 +45,13 @@ class A2AClient:
         """
         self.url = url.rstrip('/')
         self.auth_token = auth_token
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.session: Optional[httpx.AsyncClient] = None
         self._tasks: Dict[str, Dict] = {}  # Local task cache
     
     async def _ensure_session(self):
-        """Ensure HTTP session is available."""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        """Ensure the pooled HTTP client for this agent's host is available."""
+        # Looked up on every call: pools are per event loop and AdkApp may run each request on a new one
+        self.session = get_http_transport().client_for(self.url)
     
     def _get_headers(self) -> Dict[str, str]:
         """Get HTTP headers for A2A requests."""
@@ -89,35 +99,35 @@ class A2AClient:
         try:
             logger.info(f"🔧 A2A: Creating task {task_id}")
             
-            async with self.session.post(
+            response = await self.session.post(
                 f"{self.url}/tasks",
                 headers=self._get_headers(),
                 json=payload
-            ) as response:
+            )
+            
+            if response.status_code == 201:
+                result = response.json()
+                
+                # Store task locally for tracking
+                task = {
+                    "taskId": result.get("taskId", task_id),
+                    "status": result.get("status", "Pending"),
+                    "message": message,
+                    "metadata": metadata or {},
+                    "created": result.get("created"),
+                    "artifacts": result.get("artifacts", [])
+                }
+                
+                self._tasks[task["taskId"]] = task
+                logger.info(f"✅ A2A: Created task {task['taskId']}")
+                return task
+                
+            else:
+                error_text = response.text
+                logger.error(f"❌ A2A createTask failed: HTTP {response.status_code}")
+                logger.error(f"Error: {error_text}")
+                raise Exception(f"Failed to create task: {error_text}")
                 
-                if response.status == 201:
-                    result = await response.json()
-                    
-                    # Store task locally for tracking
-                    task = {
-                        "taskId": result.get("taskId", task_id),
-                        "status": result.get("status", "Pending"),
-                        "message": message,
-                        "metadata": metadata or {},
-                        "created": result.get("created"),
-                        "artifacts": result.get("artifacts", [])
-                    }
-                    
-                    self._tasks[task["taskId"]] = task
-                    logger.info(f"✅ A2A: Created task {task['taskId']}")
-                    return task
-                    
-                else:
-                    error_text = await response.text()
-                    logger.error(f"❌ A2A createTask failed: HTTP {response.status}")
-                    logger.error(f"Error: {error_text}")
-                    raise Exception(f"Failed to create task: {error_text}")
-                    
         except Exception as e:
             logger.error(f"❌ Error creating A2A task: {e}")
             raise
@@ -135,24 +145,24 @@ class A2AClient:
         await self._ensure_session()
         
         try:
-            async with self.session.get(
+            response = await self.session.get(
                 f"{self.url}/tasks/{task_id}",
                 headers=self._get_headers()
-            ) as response:
+            )
+            
+            if response.status_code == 200:
+                result = response.json()
+                
+                # Update local cache
+                self._tasks[task_id] = result
+                logger.debug(f"✅ A2A: Retrieved task {task_id}, status: {result.get('status')}")
+                return result
+                
+            else:
+                error_text = response.text
+                logger.error(f"❌ A2A getTask failed: HTTP {response.status_code}")
+                raise Exception(f"Failed to get task: {error_text}")
                 
-                if response.status == 200:
-                    result = await response.json()
-                    
-                    # Update local cache
-                    self._tasks[task_id] = result
-                    logger.debug(f"✅ A2A: Retrieved task {task_id}, status: {result.get('status')}")
-                    return result
-                    
-                else:
-                    error_text = await response.text()
-                    logger.error(f"❌ A2A getTask failed: HTTP {response.status}")
-                    raise Exception(f"Failed to get task: {error_text}")
-                    
         except Exception as e:
             logger.error(f"❌ Error getting A2A task {task_id}: {e}")
             raise
@@ -226,27 +236,8 @@ class A2AClient:
             context_id = str(uuid.uuid4())
         message_id = str(uuid.uuid4())
         
-        # A2A JSON-RPC message/send payload (based on working simple_a2a_client.py)
-        payload = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "message/send",
-            "params": {
-                "contextId": context_id,
-                "message": {
-                    "role": "user",
-                    "parts": [
-                        {
-                            "kind": "text",
-                            "text": message_text
-                        }
-                    ],
-                    "contextId": context_id,
-                    "messageId": message_id
-                },
-                "metadata": {}
-            }
-        }
+        # A2A JSON-RPC message/send payload (based on working simple_a2a_client.py), encoded straight to bytes
+        payload = message_send_payload(message_text, context_id, message_id, metadata={})
         
         # Choose headers based on auth type
         if basic_auth_header:
@@ -257,42 +248,42 @@ class A2AClient:
         try:
             logger.info(f"🔧 A2A: Sending message via message/send")
             
-            async with self.session.post(
+            response = await self.session.post(
                 self.url,  # Use base URL for JSON-RPC
                 headers=headers,
-                json=payload
-            ) as response:
+                content=payload
+            )
+            
+            if response.status_code == 200:
+                result = response.json()
+                logger.info("✅ Message sent successfully!")
+                
+                # Check for JSON-RPC error
+                if "error" in result:
+                    logger.error(f"❌ A2A JSON-RPC error: {result['error']}")
+                    raise Exception(f"A2A error: {result['error']}")
+                
+                # Extract the agent's response (based on working simple_a2a_client.py)
+                response_text = "No response received from agent"
+                if 'result' in result and 'status' in result['result'] and 'message' in result['result']['status']:
+                    agent_message = result['result']['status']['message']
+                    if 'parts' in agent_message and agent_message['parts']:
+                        response_text = agent_message['parts'][0].get('text', '')
+                        logger.info(f"🤖 Agent response: {response_text}")
+                
+                return {
+                    "status": "Completed",
+                    "response": response_text,
+                    "contextId": context_id,
+                    "full_result": result
+                }
+                
+            else:
+                error_text = response.text
+                logger.error(f"❌ A2A message/send failed: HTTP {response.status_code}")
+                logger.error(f"Error: {error_text}")
+                raise RemoteStatusError(f"Failed to send message: {error_text}", response.status_code)
                 
-                if response.status == 200:
-                    result = await response.json()
-                    logger.info("✅ Message sent successfully!")
-                    
-                    # Check for JSON-RPC error
-                    if "error" in result:
-                        logger.error(f"❌ A2A JSON-RPC error: {result['error']}")
-                        raise Exception(f"A2A error: {result['error']}")
-                    
-                    # Extract the agent's response (based on working simple_a2a_client.py)
-                    response_text = "No response received from agent"
-                    if 'result' in result and 'status' in result['result'] and 'message' in result['result']['status']:
-                        agent_message = result['result']['status']['message']
-                        if 'parts' in agent_message and agent_message['parts']:
-                            response_text = agent_message['parts'][0].get('text', '')
-                            logger.info(f"🤖 Agent response: {response_text}")
-                    
-                    return {
-                        "status": "Completed",
-                        "response": response_text,
-                        "contextId": context_id,
-                        "full_result": result
-                    }
-                    
-                else:
-                    error_text = await response.text()
-                    logger.error(f"❌ A2A message/send failed: HTTP {response.status}")
-                    logger.error(f"Error: {error_text}")
-                    raise Exception(f"Failed to send message: {error_text}")
-                    
         except Exception as e:
             logger.error(f"❌ Error sending A2A message: {e}")
             raise
@@ -359,48 +350,46 @@ class A2AClient:
             headers = self._get_headers()
         
         try:
-            async with self.session.post(
+            response = await self.session.post(
                 self.url,  # Use base URL for JSON-RPC
                 headers=headers,
                 json=payload
-            ) as response:
+            )
+            
+            if response.status_code == 200:
+                result = response.json()
+                
+                # Check for JSON-RPC error
+                if "error" in result:
+                    logger.error(f"❌ A2A JSON-RPC error: {result['error']}")
+                    raise Exception(f"A2A error: {result['error']}")
+                
+                # Extract task from result
+                task_data = result.get("result", {})
+                task = {
+                    "taskId": task_data.get("taskId", task_id),
+                    "status": task_data.get("status", {}).get("state", "Pending"),
+                    "created": task_data.get("status", {}).get("created"),
+                    "artifacts": task_data.get("artifacts", [])
+                }
+                
+                # Update local cache
+                self._tasks[task_id] = task
+                logger.debug(f"✅ A2A: Retrieved task {task_id}, status: {task.get('status')}")
+                return task
+                
+            else:
+                error_text = response.text
+                logger.error(f"❌ A2A tasks/get failed: HTTP {response.status_code}")
+                raise Exception(f"Failed to get task: {error_text}")
                 
-                if response.status == 200:
-                    result = await response.json()
-                    
-                    # Check for JSON-RPC error
-                    if "error" in result:
-                        logger.error(f"❌ A2A JSON-RPC error: {result['error']}")
-                        raise Exception(f"A2A error: {result['error']}")
-                    
-                    # Extract task from result
-                    task_data = result.get("result", {})
-                    task = {
-                        "taskId": task_data.get("taskId", task_id),
-                        "status": task_data.get("status", {}).get("state", "Pending"),
-                        "created": task_data.get("status", {}).get("created"),
-                        "artifacts": task_data.get("artifacts", [])
-                    }
-                    
-                    # Update local cache
-                    self._tasks[task_id] = task
-                    logger.debug(f"✅ A2A: Retrieved task {task_id}, status: {task.get('status')}")
-                    return task
-                    
-                else:
-                    error_text = await response.text()
-                    logger.error(f"❌ A2A tasks/get failed: HTTP {response.status}")
-                    raise Exception(f"Failed to get task: {error_text}")
-                    
         except Exception as e:
             logger.error(f"❌ Error getting A2A task {task_id}: {e}")
             raise
     
     async def close(self):
-        """Close the HTTP session."""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """Release the HTTP client (the pooled connections stay open for reuse)."""
+        self.session = None
         logger.info("Closed A2A client session")
     
     async def __aenter__(self):
@@ -453,6 +442,43 @@ class SalesforceA2AClient:
         # Store the Basic auth header for use in requests
         self.basic_auth_header = f'Basic {auth_token}'
         
+        # Per-endpoint concurrency cap + rate limit so one slow endpoint
+        # cannot starve the others (configured via SALESFORCE_A2A_* env vars)
+        self.limiters = {
+            agent_name: limiter_from_env(agent_name, "SALESFORCE_A2A")
+            for agent_name in self.agents
+        }
+        
+        # Backoff, jitter and retry budget for _send_message_with_retry (A2A_RETRY_* env vars)
+        self.retry_policy = RetryPolicy.from_env("A2A_RETRY")
+        
+        # Circuit breaker per agent URL so a down endpoint fails fast
+        self.breakers = {
+            agent_name: get_circuit_breaker(client.url)
+            for agent_name, client in self.agents.items()
+        }
+        
+        # Concurrent identical product lookups share one upstream request
+        self.produto_flight = SingleFlight("buscar_produto")
+        
+        # Product data rarely changes within a day - cache answers by normalized query.
+        # Past the soft TTL an entry is still served (up to the stale TTL) while a
+        # background task refreshes it, so frequent lookups never wait on Salesforce.
+        self.produto_cache = cache_from_env("buscar_produto", "PRODUCT_CACHE", ttl=3600, max_entries=512, stale_ttl=6 * 3600, persistent=True)
+        self.produto_lookup = StaleWhileRevalidate(self.produto_cache, self.produto_flight)
+        
+        # Batch verification fans out one buscar_produto lookup per product. The item
+        # timeout stays below the caller's deadline so one slow product is reported
+        # as failed instead of holding up the whole batch
+        self.batch_max_concurrency = int(os.getenv("PRODUCT_BATCH_MAX_CONCURRENCY", "4"))
+        self.batch_item_timeout = float(os.getenv("PRODUCT_BATCH_ITEM_TIMEOUT", "75"))
+        
+        # Client history changes more often - shorter TTLs, same stale-while-revalidate path.
+        # Only questions about an explicit CNPJ are cached (see buscar_historico), and
+        # never on disk: history answers are customer data
+        self.historico_cache = cache_from_env("buscar_historico", "HISTORY_CACHE", ttl=300, max_entries=256, stale_ttl=600)
+        self.historico_lookup = StaleWhileRevalidate(self.historico_cache)
+        
         # Context management for maintaining conversation state
         # Each agent has its own context ID that persists across calls
         self.context_ids = {
@@ -508,17 +534,42 @@ class SalesforceA2AClient:
         self.context_timestamps[agent_name] = None
         logger.info(f"🗑️  Cleared expired context for {agent_name}")
     
-    async def _send_message_with_retry(self, agent_name: str, query: str, max_retries: int = 5) -> str:
-        """Send message with persistent retry logic for timeouts and empty responses (like SalesforceAgentManager)."""
-        for attempt in range(max_retries + 1):
+    async def _send_message_with_retry(self, agent_name: str, query: str, max_retries: Optional[int] = None, context_id: Optional[str] = None) -> str:
+        """
+        Send message with retry logic for timeouts and empty responses, governed by the retry policy.
+        
+        ``context_id`` gives the call its own context (batch items); when None
+        the agent's shared conversation context is used.
+        """
+        own_context_id = context_id
+        policy = self.retry_policy
+        max_attempts = policy.max_attempts if max_retries is None else max_retries + 1
+        policy.budget.record_request()
+        
+        breaker = self.breakers[agent_name]
+        
+        for attempt in range(max_attempts):
+            error = None
             try:
+                # Fail fast while the endpoint's circuit is open
+                breaker.before_call()
+                
                 # Get current context ID (may be updated during retries)
-                context_id = self._get_or_create_context_id(agent_name)
+                context_id = own_context_id or self._get_or_create_context_id(agent_name)
                 
-                # Send message with current context
-                result = await self.agents[agent_name].send_message_a2a(
-                    query, self.basic_auth_header, context_id
-                )
+                # Send message with current context, within the endpoint's limits
+                async with self.limiters[agent_name].acquire():
+                    try:
+                        result = await self.agents[agent_name].send_message_a2a(
+                            query, self.basic_auth_header, context_id
+                        )
+                    except Exception as e:
+                        if self.retry_policy.classify(e) in UNHEALTHY_ERROR_CLASSES:
+                            breaker.record_failure()
+                        else:
+                            breaker.record_success()
+                        raise
+                    breaker.record_success()
                 
                 response_text = result.get("response", "")
                 
@@ -540,45 +591,31 @@ class SalesforceA2AClient:
                     if not is_generic or len(response_text) > 50:  # Longer responses are likely meaningful
                         logger.info(f"✅ Got meaningful response from {agent_name} on attempt {attempt + 1}")
                         return response_text
-                    else:
-                        logger.warning(f"🔄 Got generic response from {agent_name}, retrying (attempt {attempt + 1}/{max_retries + 1})")
                 
-                # If empty response or generic response, retry
-                if attempt < max_retries:
-                    logger.warning(f"🔄 Empty or generic response from {agent_name}, retrying (attempt {attempt + 1}/{max_retries + 1})")
-                    # Wait a bit before retry to avoid overwhelming the agent
-                    await asyncio.sleep(1)
-                    continue
-                else:
-                    logger.error(f"❌ Failed to get meaningful response from {agent_name} after {max_retries + 1} attempts")
-                    return "Error: No meaningful response received after multiple attempts"
+                error_class = "empty_response"
                 
             except Exception as e:
-                error_message = str(e).lower()
-                
-                # Check for timeout errors (very common with Salesforce agents)
-                if "timeout" in error_message and attempt < max_retries:
-                    logger.info(f"🔄 Timeout for {agent_name} (attempt {attempt + 1}/{max_retries + 1}), retrying...")
-                    # Wait before retry for timeout
-                    await asyncio.sleep(2)
-                    continue
-                
-                # Check for context expiration error (500 with "not found (404)" like in SalesforceAgentManager)
-                if ("not found (404)" in error_message or "context" in error_message) and attempt < max_retries:
-                    logger.info(f"🔄 Context expired for {agent_name} (attempt {attempt + 1}/{max_retries + 1}), generating new context...")
-                    
-                    # Clear expired context and create new one
-                    self._clear_expired_context(agent_name)
-                    continue
-                
-                # For other errors, retry a few times before giving up
-                if attempt < max_retries:
-                    logger.warning(f"🔄 Retry {attempt + 1}/{max_retries + 1} for {agent_name}: {e}")
-                    await asyncio.sleep(1)
-                    continue
+                error = e
+                error_class = policy.classify(e)
+            
+            if not policy.should_retry(error_class, attempt, max_attempts):
+                if error is not None:
+                    logger.error(f"❌ Failed after {attempt + 1} attempts for {agent_name} ({error_class}): {error}")
+                    raise error
+                logger.error(f"❌ Failed to get meaningful response from {agent_name} after {attempt + 1} attempts")
+                return "Error: No meaningful response received after multiple attempts"
+            
+            if error_class == "context_expired":
+                # Salesforce dropped our context - clear it so the retry creates a new one
+                logger.info(f"🔄 Context expired for {agent_name} (attempt {attempt + 1}/{max_attempts}), generating new context...")
+                if own_context_id:
+                    own_context_id = self._generate_context_id()
                 else:
-                    logger.error(f"❌ Failed after {max_retries + 1} attempts for {agent_name}: {e}")
-                    raise e
+                    self._clear_expired_context(agent_name)
+            else:
+                logger.warning(f"🔄 {error_class} from {agent_name}, retrying (attempt {attempt + 1}/{max_attempts}){f': {error}' if error else ''}")
+            
+            await policy.wait(error_class, attempt)
         
         return "Error: Failed to send message after retries"
     
@@ -586,20 +623,81 @@ class SalesforceA2AClient:
         """Get client history from Salesforce via A2A protocol with persistent context."""
         try:
             logger.info(f"🔧 A2A: Searching client history")
-            return await self._send_message_with_retry("buscar_historico", query)
+            if extract_cnpj(query) is None:
+                # Free-text questions ("e o último pedido dele?") depend on the conversation
+                # so far, so the same text can mean another client for another user
+                return await self._send_message_with_retry("buscar_historico", query)
+            return await self.historico_lookup.get(
+                normalize_query(query),
+                lambda: self._send_message_with_retry("buscar_historico", query),
+                should_cache=self._is_cacheable,
+            )
         except Exception as e:
             logger.error(f"❌ Error in buscar_historico: {e}")
             return f"Erro ao consultar histórico do cliente: {str(e)}"
     
-    async def buscar_produto(self, query: str) -> str:
-        """Search for products in Salesforce via A2A protocol with persistent context."""
+    async def buscar_produto(self, query: str, context_id: Optional[str] = None) -> str:
+        """
+        Search for products in Salesforce via A2A protocol with persistent context.
+        
+        Pass ``context_id`` to run the lookup in its own context instead of the shared one.
+        """
         try:
             logger.info(f"🔧 A2A: Searching products")
-            return await self._send_message_with_retry("buscar_produto", query)
+            return await self.produto_lookup.get(
+                normalize_query(query),
+                lambda: self._send_message_with_retry("buscar_produto", query, context_id=context_id),
+                should_cache=self._is_cacheable,
+            )
         except Exception as e:
             logger.error(f"❌ Error in buscar_produto: {e}")
             return f"Erro ao buscar produtos: {str(e)}"
     
+    async def verificar_produtos(self, produtos: List[str]) -> str:
+        """
+        Verify several products in Salesforce, one buscar_produto lookup per product,
+        run concurrently and merged into a single report.
+        """
+        names = split_items(produtos)
+        if not names:
+            return "Informe os nomes dos produtos para verificar."
+        
+        logger.info(f"🔧 A2A: Verifying {len(names)} products in parallel")
+        # Each product gets its own context so concurrent lookups never share (or clear) one
+        results = await run_batch(
+            names,
+            lambda name: self.buscar_produto(f"Buscar produto: {name}", context_id=self._generate_context_id()),
+            max_concurrency=self.batch_max_concurrency,
+            item_timeout=self.batch_item_timeout,
+        )
+        
+        answered, failed = [], []
+        for item in results:
+            if item.status == "ok" and not item.result.startswith(("Error", "Erro")):
+                answered.append(f"### {item.item}\n{item.result}")
+            else:
+                failed.append(f"### {item.item}\n{item.error or item.result}")
+        
+        sections = [f"Verificação de {len(names)} produtos: {len(answered)} com resposta do Salesforce, {len(failed)} com falha."]
+        if answered:
+            sections.append("## RESPOSTAS DO SALESFORCE POR PRODUTO\n\n" + "\n\n".join(answered))
+        if failed:
+            sections.append("## FALHA NA CONSULTA (não verificados, tente novamente)\n\n" + "\n\n".join(failed))
+        return "\n\n".join(sections)
+    
+    @staticmethod
+    def _is_cacheable(response: str) -> bool:
+        """Only real answers are cached, never error messages."""
+        return not response.startswith("Error")
+    
+    def invalidate_produto_cache(self, query: Optional[str] = None) -> int:
+        """Drop the cached answer for ``query``, or every cached product answer when None."""
+        if query is None:
+            count = len(self.produto_cache)
+            self.produto_cache.clear()
+            return count
+        return int(self.produto_cache.invalidate(normalize_query(query)))
+    
     async def oportunidades(self, query: str) -> str:
         """Manage opportunities in Salesforce via A2A protocol with persistent context."""
         try:
@@ -609,6 +707,21 @@ class SalesforceA2AClient:
             logger.error(f"❌ Error in oportunidades: {e}")
             return f"Erro ao gerenciar oportunidades: {str(e)}"
     
+    def get_circuit_states(self) -> Dict[str, Dict[str, object]]:
+        """Return the circuit breaker state of each endpoint."""
+        return {agent_name: breaker.get_stats() for agent_name, breaker in self.breakers.items()}
+    
+    def get_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return hit/miss counters of the response caches."""
+        return {
+            "buscar_produto": self.produto_lookup.get_stats(),
+            "buscar_historico": self.historico_lookup.get_stats(),
+        }
+    
+    def get_limiter_stats(self) -> Dict[str, Dict[str, float]]:
+        """Return queueing metrics of each endpoint limiter."""
+        return {agent_name: limiter.get_stats() for agent_name, limiter in self.limiters.items()}
+    
     async def close_all(self):
         """Close all A2A client sessions."""
         for agent_name, client in self.agents.items():
@@ -3,12 +3,14 @@ Data and AI Tool - Real implementation using the deployed datastore_agent as a s
 """
 
 import logging
-import asyncio
+import httpx
 from google.adk.tools import FunctionTool
-import google.auth
-import google.auth.transport.requests
-import requests
-import json
+
+from team_agent_a2a.shared.cache import StaleWhileRevalidate, cache_from_env
+from team_agent_a2a.shared.reasoning_engine import ReasoningEngineError, get_reasoning_engine_client
+from team_agent_a2a.shared.session_pool import session_pool_from_env
+from team_agent_a2a.shared.streaming import emit_partial
+from team_agent_a2a.shared.utils import normalize_query
 
 logger = logging.getLogger(__name__)
 
@@ -19,16 +21,30 @@ LOCATION = "us-central1"
 
 logger.info(f"Initializing Data & AI tool using datastore_agent service: {DATASTORE_AGENT_ID}")
 
-def get_google_token():
-    """Get Google Cloud authentication token"""
+# Async client of the datastore reasoning engine (pooled, never blocks the event loop)
+_engine = get_reasoning_engine_client(DATASTORE_AGENT_ID, PROJECT_ID, LOCATION)
+
+# Pre-created datastore sessions, recycled after a few queries so their history stays small
+_sessions = session_pool_from_env(_engine, "data_ai_tool", "DATASTORE_SESSION")
+
+# Datastore offers change rarely - cache search answers by normalized query
+_search_cache = cache_from_env("data_and_ai", "DATA_AI_CACHE", ttl=3600, max_entries=256, persistent=True)
+_search_lookup = StaleWhileRevalidate(_search_cache)
+
+def warm_up_sessions(callback_context=None):
+    """
+    Pre-create datastore sessions in the background.
+    
+    Used as the coordinator's before_agent_callback (the deployed app has no
+    other startup hook), so sessions are ready by the time data_and_ai runs;
+    later calls only top the pool up.
+    """
     try:
-        credentials, project = google.auth.default()
-        auth_req = google.auth.transport.requests.Request()
-        credentials.refresh(auth_req)
-        return credentials.token
-    except Exception as e:
-        logger.error(f"Failed to get Google Cloud token: {e}")
-        return None
+        _sessions.warm()
+    except RuntimeError:
+        # No running event loop yet; the next turn warms the pool
+        logger.debug("Datastore session warm-up deferred until an event loop is running")
+    return None
 
 async def data_and_ai(query: str) -> str:
     """
@@ -40,62 +56,27 @@ async def data_and_ai(query: str) -> str:
     Returns:
         Relevant B2B offers and products from the datastore
     """
+    return await _search_lookup.get(
+        normalize_query(query),
+        lambda: _data_and_ai_uncached(query),
+        should_cache=lambda response: response.startswith("Produtos disponíveis"),
+    )
+
+async def _data_and_ai_uncached(query: str) -> str:
+    """Query the datastore_agent service for ``query`` (no caching)."""
     try:
         logger.info(f"🔧 DATA AI TOOL: Searching via datastore_agent for: {query[:100]}{'...' if len(query) > 100 else ''}")
         
-        # Get authentication token
-        token = get_google_token()
-        if not token:
-            return "Error: Could not authenticate with Google Cloud"
-        
-        # Create session with datastore agent
-        session_url = f"https://{LOCATION}-aiplatform.googleapis.com/v1/projects/{PROJECT_ID}/locations/{LOCATION}/reasoningEngines/{DATASTORE_AGENT_ID}:query"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-        
-        # Create session
-        session_payload = {
-            "class_method": "create_session",
-            "input": {"user_id": "data_ai_tool"}
-        }
-        
-        session_response = requests.post(session_url, headers=headers, json=session_payload, timeout=30)
-        session_response.raise_for_status()
-        session_data = session_response.json()
-        session_id = session_data["output"]["id"]
-        
-        # Query the datastore agent using stream_query
+        # Take a ready session of the datastore agent from the pool, then query it using stream_query
         # Note: The datastore agent expects queries with product attributes and criteria
         # We pass the query directly to let the datastore agent extract keywords
-        query_url = f"https://{LOCATION}-aiplatform.googleapis.com/v1/projects/{PROJECT_ID}/locations/{LOCATION}/reasoningEngines/{DATASTORE_AGENT_ID}:streamQuery?alt=sse"
-        query_payload = {
-            "class_method": "stream_query", 
-            "input": {
-                "user_id": "data_ai_tool",
-                "session_id": session_id,
-                "message": f"Buscar produtos com os seguintes critérios: {query}"
-            }
-        }
-        
-        query_response = requests.post(query_url, headers=headers, json=query_payload, timeout=60, stream=True)
-        query_response.raise_for_status()
-        
-        # Parse streaming response
-        response_text = ""
-        for line in query_response.iter_lines():
-            if line:
-                line_str = line.decode('utf-8').strip()
-                if line_str:  # Skip empty lines
-                    try:
-                        json_data = json.loads(line_str)
-                        if "content" in json_data and "parts" in json_data["content"]:
-                            for part in json_data["content"]["parts"]:
-                                if "text" in part:
-                                    response_text += part["text"]
-                    except json.JSONDecodeError:
-                        continue
+        async with _sessions.session() as session_id:
+            response_text = await _engine.stream_query_text(
+                "data_ai_tool",
+                session_id,
+                f"Buscar produtos com os seguintes critérios: {query}",
+                on_chunk=emit_partial,  # relayed as partial results when a relay is installed
+            )
         
         if response_text.strip():
             # Format for teams_agent context
@@ -104,10 +85,12 @@ async def data_and_ai(query: str) -> str:
         
         return "No results found in the datastore for the given query."
             
-    except requests.exceptions.Timeout:
+    except ReasoningEngineError:
+        return "Error: Could not authenticate with Google Cloud"
+    except httpx.TimeoutException:
         logger.error("Timeout while querying datastore agent")
         return "Error: Search request timed out. Please try again."
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"HTTP error while querying datastore agent: {e}")
         return f"Error: Failed to search datastore - {str(e)}"
     except Exception as e:
@@ -4,6 +4,7 @@ Tools that use the A2A protocol to communicate with external Salesforce agents.
 """
 
 import logging
+from typing import List
 from google.adk.tools import FunctionTool
 from teams_agent.tools.a2a_client import get_salesforce_a2a_client
 
@@ -66,6 +67,27 @@ async def buscar_produto(query: str) -> str:
         return f"Erro ao buscar produtos via A2A: {str(e)}"
 
 
+async def verificar_produtos(produtos: List[str]) -> str:
+    """
+    Verify several products in Salesforce via A2A protocol, one search per product in parallel.
+    
+    Args:
+        produtos: Product names to verify (one name per item)
+        
+    Returns:
+        Verification report with the Salesforce answer for each product
+    """
+    try:
+        logger.info(f"🔧 A2A TOOL: verificar_produtos({len(produtos or [])} produtos)")
+        
+        client = await get_salesforce_a2a_client()
+        return await client.verificar_produtos(produtos or [])
+            
+    except Exception as e:
+        logger.error(f"Error in A2A verificar_produtos: {e}")
+        return f"Erro ao verificar produtos via A2A: {str(e)}"
+
+
 async def oportunidades(query: str) -> str:
     """
     Manage sales opportunities via A2A protocol.
@@ -97,11 +119,13 @@ async def oportunidades(query: str) -> str:
 # Create ADK FunctionTool instances
 buscar_historico_tool = FunctionTool(func=buscar_historico)
 buscar_produto_tool = FunctionTool(func=buscar_produto)
+verificar_produtos_tool = FunctionTool(func=verificar_produtos)
 oportunidades_tool = FunctionTool(func=oportunidades)
 
 # All tools list for easy import
 all_salesforce_a2a_tools = [
     buscar_historico_tool,
     buscar_produto_tool,
+    verificar_produtos_tool,
     oportunidades_tool
 ]
@@ -9,6 +9,8 @@ import google.auth.transport.requests
 import json
 import time
 
+from team_agent_a2a.shared.stream_parser import event_texts, iter_records
+
 PROJECT_ID = "gglobo-agentsb2b-hdg-dev"
 LOCATION = "us-central1"
 ENGINE_ID = "4757723152828596224"
@@ -82,40 +84,22 @@ def test_endpoint():
             r.raise_for_status()
             print("✅ Connection established")
             
-            full_response = ""
+            text_parts = []
             chunk_count = 0
             
-            for chunk in r.iter_content(chunk_size=None):
-                if chunk:
-                    chunk_count += 1
-                    chunk_str = chunk.decode('utf-8')
-                    
-                    # Try to parse as direct JSON first
-                    try:
-                        data_json = json.loads(chunk_str)
-                        if 'content' in data_json and 'parts' in data_json['content']:
-                            for part in data_json['content']['parts']:
-                                if 'text' in part:
-                                    text = part['text']
-                                    print(text, end='', flush=True)
-                                    full_response += text
-                        continue
-                    except json.JSONDecodeError:
-                        pass
-                    
-                    # Parse SSE format
-                    for line in chunk_str.split('\n'):
-                        if line.startswith('data: '):
-                            try:
-                                data_json = json.loads(line[6:])
-                                if 'parts' in data_json:
-                                    for part in data_json['parts']:
-                                        if 'text' in part:
-                                            text = part['text']
-                                            print(text, end='', flush=True)
-                                            full_response += text
-                            except json.JSONDecodeError:
-                                pass
+            def counted_chunks():
+                nonlocal chunk_count
+                for chunk in r.iter_content(chunk_size=None):
+                    if chunk:
+                        chunk_count += 1
+                        yield chunk
+            
+            # Handles both SSE "data:" frames and bare JSON lines, even when split across chunks
+            for event in iter_records(counted_chunks()):
+                for text in event_texts(event):
+                    print(text, end='', flush=True)
+                    text_parts.append(text)
+            full_response = "".join(text_parts)
             
             print("\n" + "-"*70)
             